@@ -1,9 +1,7 @@
 import logging
-import os
 from typing import Optional
 
-from dotenv import load_dotenv
-from openai import OpenAI
+from telegram.ext import Application, CallbackContext
 
 from database_manager import DatabaseManager
 from lobby.lobby_manager import LobbyManager
@@ -57,6 +55,28 @@ class ServiceContainer:
         """Алиас для совместимости со старым кодом"""
         return self.game_logic
 
+    async def startup(self, application: Optional[Application] = None) -> None:
+        """Запуск фоновых сервисов после старта приложения"""
+        # Игры, шедшие до перезапуска, восстанавливаем из снимка
+        restored = await self.game_logic.restore_games()
+        if application is not None:
+            self.game_logic.resume_games(CallbackContext(application), restored)
+        self.game_logic.snapshot.start()
+
+        await self.game_logic.role_pool.start()
+        logger.info("Фоновые сервисы запущены")
+
+    async def shutdown(self) -> None:
+        """Освобождение ресурсов при остановке бота"""
+        await self.game_logic.scheduler.stop()
+        await self.game_logic.snapshot.stop()
+        await self.game_logic.role_pool.stop()
+        await self.game_logic.notifier.outbound.stop()
+        await self.game_logic.llm.close()
+        await self.game_logic.storage.journal.stop()
+        self.db_manager.disconnect()
+        logger.info("ServiceContainer остановлен")
+
     def get_game_notifier(self):
         """Получение GameNotifier для тестирования"""
         return self.game_logic.notifier
@@ -11,11 +11,22 @@ from telegram.ext import (
     MessageHandler,
     filters,
     ConversationHandler,
+    TypeHandler,
 )
 
 from ServiceController import ServiceContainer
-from config import SELECTING_ACTION, JOINING_LOBBY, WAITING_FOR_THEME
-from handlers.base_command import cancel, start, help_command, leave
+from config import (
+    SELECTING_ACTION,
+    JOINING_LOBBY,
+    WAITING_FOR_THEME,
+    TELEGRAM_API_BASE_URL,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from handlers.base_command import cancel, start, help_command, leave, remember_user
 from lobby.commands import (
     button_callback,
     process_invite_code,
@@ -36,6 +47,36 @@ logging.basicConfig(
 logging.getLogger('httpx').setLevel(logging.WARNING)  # убираем лишние логи
 logger = logging.getLogger(__name__)
 
+# Бот обрабатывает только сообщения и нажатия кнопок
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+
+async def on_startup(application: Application) -> None:
+    """Запуск фоновых сервисов вместе с приложением"""
+    await ServiceContainer().startup(application)
+
+
+async def on_shutdown(application: Application) -> None:
+    """Остановка фоновых сервисов вместе с приложением"""
+    await ServiceContainer().shutdown()
+
+
+def run_webhook(application: Application) -> None:
+    """Прием обновлений через webhook"""
+    if not WEBHOOK_SECRET:
+        # Случайный секрет у каждого экземпляра перерегистрировал бы webhook
+        # со своим значением, и остальные экземпляры отклоняли бы запросы
+        raise RuntimeError("В режиме webhook нужно задать WEBHOOK_SECRET")
+
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=ALLOWED_UPDATES,
+    )
+
 
 def main() -> None:
     """Запуск бота."""
@@ -48,7 +89,20 @@ def main() -> None:
     services = ServiceContainer()
     game_logic = services.game_logic
 
-    application = Application.builder().token(BOT_TOKEN).build()
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .post_init(on_startup)
+        .post_shutdown(on_shutdown)
+    )
+    if TELEGRAM_API_BASE_URL:
+        base_url = TELEGRAM_API_BASE_URL.rstrip("/")
+        builder = builder.base_url(f"{base_url}/bot").base_file_url(
+            f"{base_url}/file/bot"
+        )
+    application = builder.build()
+    # Имена игроков берем из каждого обновления до основных обработчиков
+    application.add_handler(TypeHandler(Update, remember_user), group=-1)
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("help", help_command))
     application.add_handler(CommandHandler("leave", leave))
@@ -95,7 +149,10 @@ def main() -> None:
     )
 
     # Запускаем бота
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if WEBHOOK_URL:
+        run_webhook(application)
+    else:
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == "__main__":
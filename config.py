@@ -1,2 +1,101 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
 # Состояния для ConversationHandler
 SELECTING_ACTION, CREATING_LOBBY, JOINING_LOBBY, WAITING_FOR_THEME = range(4)
+
+# Таймаут одного запроса к LLM (секунды), размер пула HTTP-соединений
+# и число повторов запроса при сетевых ошибках
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+
+# Голосование ботов: сколько ботов одновременно обращаются к LLM
+# и сколько секунд ждать ответа одного бота
+BOT_VOTE_CONCURRENCY = int(os.getenv("BOT_VOTE_CONCURRENCY", "4"))
+BOT_VOTE_TIMEOUT = float(os.getenv("BOT_VOTE_TIMEOUT", "15"))
+
+# Кэш ответов ботов на вопросы (роль, вопрос): размер и время жизни (сек)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "10000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+
+# Пул заранее сгенерированных ролей: сколько персонажей держать на тему,
+# сколько просить у LLM за раз и сколько тем хранить одновременно
+ROLE_POOL_WATERMARK = int(os.getenv("ROLE_POOL_WATERMARK", "40"))
+ROLE_POOL_BATCH_SIZE = int(os.getenv("ROLE_POOL_BATCH_SIZE", "20"))
+ROLE_POOL_MAX_THEMES = int(os.getenv("ROLE_POOL_MAX_THEMES", "100"))
+# Сколько секунд ждать первую партию персонажей новой темы при старте игры
+ROLE_POOL_WAIT_TIMEOUT = float(os.getenv("ROLE_POOL_WAIT_TIMEOUT", "10"))
+
+# Кэш персонажей по темам: число тем, время жизни (сек)
+# и сколько персонажей хранить на тему
+THEME_CACHE_SIZE = int(os.getenv("THEME_CACHE_SIZE", "500"))
+THEME_CACHE_TTL = float(os.getenv("THEME_CACHE_TTL", str(7 * 24 * 3600)))
+THEME_CACHE_MAX_ROLES = int(os.getenv("THEME_CACHE_MAX_ROLES", "100"))
+
+# Спекулятивное вычисление следующего вопроса бота во время голосования
+# (ускоряет ходы ботов ценой дополнительных запросов к LLM)
+BOT_PREFETCH = os.getenv("BOT_PREFETCH", "false").lower() in ("1", "true", "yes")
+
+# Промпт бота: сколько последних вопросов передавать дословно
+# и сколько фактов каждого вида оставлять в сводке ранних вопросов
+PROMPT_HISTORY_VERBATIM = int(os.getenv("PROMPT_HISTORY_VERBATIM", "12"))
+PROMPT_MAX_FACTS = int(os.getenv("PROMPT_MAX_FACTS", "30"))
+
+# Сколько сообщений отправлять в Telegram одновременно
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "10"))
+
+# Лимиты отправки сообщений Telegram: сообщений в секунду на бота,
+# на один чат (с запасом OUTBOUND_CHAT_BURST) и число повторов при ошибках сети
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+
+# Кэш имен игроков: размер, время жизни (сек), время, на которое
+# запоминается неудачный запрос к Telegram, и число параллельных запросов
+USERNAME_CACHE_SIZE = int(os.getenv("USERNAME_CACHE_SIZE", "10000"))
+USERNAME_CACHE_TTL = float(os.getenv("USERNAME_CACHE_TTL", "3600"))
+USERNAME_NEGATIVE_TTL = float(os.getenv("USERNAME_NEGATIVE_TTL", "300"))
+USERNAME_FETCH_CONCURRENCY = int(os.getenv("USERNAME_FETCH_CONCURRENCY", "15"))
+
+# SQLite: размер кэша страниц (КБ) и memory-mapped области (байт) на соединение,
+# сколько ждать освобождения блокировки (мс)
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", "16384"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+
+# Число потоков для запросов к БД вне event loop
+DB_WORKERS = int(os.getenv("DB_WORKERS", "4"))
+
+# Отложенная запись истории вопросов и ролей: как часто сбрасывать в БД (сек)
+# и при каком числе накопленных записей сбрасывать сразу
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("JOURNAL_FLUSH_INTERVAL", "0.5"))
+JOURNAL_MAX_PENDING = int(os.getenv("JOURNAL_MAX_PENDING", "500"))
+# Сколько раз подряд повторять сброс журнала, пока БД занята
+JOURNAL_MAX_RETRIES = int(os.getenv("JOURNAL_MAX_RETRIES", "5"))
+
+# Снимок активных игр для восстановления после перезапуска:
+# файл и как часто его обновлять (сек)
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "data/games_snapshot.jsonl")
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "30"))
+
+# Журнал событий игр: через сколько событий сохранять контрольную точку
+GAME_CHECKPOINT_EVERY = int(os.getenv("GAME_CHECKPOINT_EVERY", "100"))
+
+# Режим webhook: если задан WEBHOOK_URL (публичный адрес бота), обновления
+# принимаются по HTTP вместо long polling. Адрес и порт локального сервера,
+# путь webhook и секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+# (обязателен и должен совпадать у всех экземпляров бота)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+# Адрес Bot API, если не api.telegram.org (локальный Bot API сервер
+# или заглушка для тестов)
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "")
@@ -1,9 +1,103 @@
+import asyncio
+import functools
+import logging
 import threading
 import sqlite3
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from config import DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE_KB, DB_MMAP_SIZE, DB_WORKERS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Миграции схемы: (версия, описание, SQL-команды).
+# Применяются по порядку, каждая в своей транзакции; новые - только в конец списка
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (
+        1,
+        "Индексы для поиска игроков, лобби и истории вопросов",
+        [
+            # get_user_lobby, проверки участия игрока
+            """
+            CREATE INDEX IF NOT EXISTS idx_lobby_players_user
+            ON lobby_players (user_id)
+            """,
+            # get_lobby_info: игроки лобби по порядку входа
+            """
+            CREATE INDEX IF NOT EXISTS idx_lobby_players_lobby
+            ON lobby_players (lobby_id, joined_at)
+            """,
+            # get_player_question_history
+            """
+            CREATE INDEX IF NOT EXISTS idx_question_history_player
+            ON question_history (user_id, lobby_id, asked_at)
+            """,
+            # Повторяющиеся коды оставляем только у самого нового лобби
+            """
+            UPDATE lobbies SET invite_code = ''
+            WHERE invite_code != '' AND lobby_id NOT IN (
+                SELECT MAX(lobby_id) FROM lobbies
+                WHERE invite_code != ''
+                GROUP BY invite_code
+            )
+            """,
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_lobbies_invite_code
+            ON lobbies (invite_code) WHERE invite_code != ''
+            """,
+        ],
+    ),
+    (
+        2,
+        "Журнал событий игр и контрольные точки",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS game_events (
+                lobby_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (lobby_id, seq),
+                FOREIGN KEY (lobby_id) REFERENCES lobbies(lobby_id) ON DELETE CASCADE
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS game_checkpoints (
+                lobby_id INTEGER PRIMARY KEY,
+                seq INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (lobby_id) REFERENCES lobbies(lobby_id) ON DELETE CASCADE
+            )
+            """,
+        ],
+    ),
+]
+
+
+def run_in_db_thread(method: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    """
+    Декоратор синхронного метода сервиса с атрибутом db:
+    метод становится корутиной и выполняется в пуле потоков БД.
+    """
+
+    @functools.wraps(method)
+    async def wrapper(self, *args: Any, **kwargs: Any) -> T:
+        return await self.db.run_async(method, self, *args, **kwargs)
+
+    return wrapper
 
 
 class DatabaseManager:
+    """
+    Доступ к SQLite: у каждого потока свое соединение (WAL, настроенные
+    pragma), на каждую операцию выдается отдельный короткоживущий курсор.
+    """
+
     _instance: Optional['DatabaseManager'] = None
     _lock = threading.Lock()
     _initialized = False
@@ -13,8 +107,10 @@ class DatabaseManager:
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
                 cls._instance.db_name = db_name
-                cls._instance._connection = None
-                cls._instance.cursor = None
+                cls._instance._local = threading.local()
+                cls._instance._connections = []
+                cls._instance._connections_lock = threading.Lock()
+                cls._instance._executor = cls._create_executor()
             return cls._instance
 
     def __init__(self, db_name="data/database.db"):
@@ -31,16 +127,80 @@ class DatabaseManager:
         # if not os.path.exists(self.db_name):
         #     flag = True
 
-        if self._connection is None:
-            self._connection = sqlite3.connect(self.db_name, check_same_thread=False)
-            self.cursor = self._connection.cursor()
+        # WAL хранится в самом файле БД, достаточно включить один раз
+        self.connection.execute("PRAGMA journal_mode = WAL")
 
         # if flag:
         #     self.create_tables()
         self.create_tables()
+        self.migrate()
+
+    @staticmethod
+    def _create_executor() -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+
+    async def run_async(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Выполнение синхронной работы с БД в пуле потоков, не блокируя event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """Новое соединение с настройками производительности"""
+        connection = sqlite3.connect(self.db_name, check_same_thread=False)
+        connection.execute("PRAGMA synchronous = NORMAL")
+        connection.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        connection.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        connection.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        connection.execute("PRAGMA foreign_keys = ON")
+
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Соединение текущего потока"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._open_connection()
+        return connection
+
+    @contextmanager
+    def cursor(self) -> Iterator[sqlite3.Cursor]:
+        """Курсор для одной операции чтения"""
+        cursor = self.connection.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Курсор для записи: commit при успехе, rollback при ошибке.
+        Транзакция сразу берет блокировку на запись, поэтому проверки
+        и изменения внутри нее не пересекаются с другими потоками.
+        """
+        connection = self.connection
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            yield cursor
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
 
     def create_tables(self):
-        self.cursor.execute(
+        with self.transaction() as cursor:
+            self._create_tables(cursor)
+
+    def _create_tables(self, cursor: sqlite3.Cursor):
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS lobbies (
                 lobby_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -57,7 +217,7 @@ class DatabaseManager:
         )
 
         # Создадим также таблицу для игроков в лобби
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS lobby_players (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -70,7 +230,7 @@ class DatabaseManager:
             """
         )
 
-        self.cursor.execute(
+        cursor.execute(
             """
             CREATE TABLE IF NOT EXISTS question_history (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -85,9 +245,64 @@ class DatabaseManager:
             """
         )
 
-        self._connection.commit()
+        # Кэш персонажей, сгенерированных по темам
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS theme_cache (
+                theme_key TEXT PRIMARY KEY,
+                characters TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER DEFAULT 0,
+                misses INTEGER DEFAULT 0
+            )
+            """
+        )
+
+    def migrate(self):
+        """Применение миграций, которых еще нет в schema_version"""
+        with self.transaction() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
+        for version, description, statements in MIGRATIONS:
+            # Версия проверяется под блокировкой на запись:
+            # другой процесс не применит ту же миграцию повторно
+            with self.transaction() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM schema_version WHERE version = ?", (version,)
+                )
+                if cursor.fetchone():
+                    continue
+
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                    (version, description),
+                )
+            logger.info(f"Применена миграция БД {version}: {description}")
+
+    def schema_version(self) -> int:
+        """Текущая версия схемы"""
+        with self.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+            return cursor.fetchone()[0]
 
     def disconnect(self):
-        if self._connection is not None:
-            self._connection.close()
-            self._connection = None
+        # Дожидаемся запросов, уже отправленных в пул потоков
+        self._executor.shutdown(wait=True)
+        self._executor = self._create_executor()
+
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
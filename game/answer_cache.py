@@ -0,0 +1,44 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL
+from utils.ttl_cache import TTLCache
+
+_SPACES_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " ?!.,;:…«»\"'"
+
+
+def normalize_role(role: str) -> str:
+    """Приведение имени персонажа к каноническому виду"""
+    return _SPACES_RE.sub(" ", role.casefold().replace("ё", "е")).strip()
+
+
+def normalize_question(question: str) -> str:
+    """Приведение вопроса к каноническому виду (регистр, пробелы, знаки)"""
+    return normalize_role(question).strip(_EDGE_PUNCTUATION)
+
+
+class AnswerCache:
+    """Общий для всех ботов и игр кэш ответов «да/нет» о персонажах"""
+
+    def __init__(
+        self, max_size: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL
+    ):
+        self._cache = TTLCache(max_size, ttl)
+
+    @staticmethod
+    def make_key(role: str, question: str) -> Tuple[str, str]:
+        """Ключ кэша по нормализованным роли и вопросу"""
+        return normalize_role(role), normalize_question(question)
+
+    def get(self, role: str, question: str) -> Optional[bool]:
+        """Ответ из кэша или None"""
+        return self._cache.get(self.make_key(role, question))
+
+    def put(self, role: str, question: str, answer: bool) -> None:
+        """Сохранение ответа"""
+        self._cache.set(self.make_key(role, question), answer)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий и промахов"""
+        return self._cache.stats()
@@ -1,19 +1,10 @@
 from dataclasses import dataclass
 import json
-import os
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
-load_dotenv()
-YANDEX_CLOUD_FOLDER = os.getenv("YANDEX_CLOUD_FOLDER")
-YANDEX_CLOUD_API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
-AI_client = OpenAI(
-    api_key=YANDEX_CLOUD_API_KEY,
-    base_url="https://llm.api.cloud.yandex.net/v1",
-    project=YANDEX_CLOUD_FOLDER,
-)
+from game.answer_cache import AnswerCache
+from game.llm_client import LLMClient
+from game.prompt_builder import BotPromptBuilder, SYSTEM_PROMPT
 
 
 @dataclass
@@ -25,90 +16,32 @@ class ResponseQuestion:
 class BotPlayer:
     """Игрок-бот с искусственным интеллектом"""
 
-    def __init__(self, bot_id: int, role: str):
+    def __init__(
+        self,
+        bot_id: int,
+        role: str,
+        llm: LLMClient,
+        answer_cache: Optional[AnswerCache] = None,
+    ):
         self.id = bot_id  # Отрицательный ID для ботов
+        self.llm = llm
+        self.answer_cache = answer_cache
         self.history: List[Tuple[str, str]] = list()
         self.assigned_role: str = ""  # Роль, которая назначена боту (скрыта от него)
+        self.prompt_builder = BotPromptBuilder()
 
-    def ask(self) -> ResponseQuestion:
+    async def ask(
+        self, history: Optional[List[Tuple[str, str]]] = None
+    ) -> ResponseQuestion:
         """
         Формирует новый вопрос для угадывания персонажа на основе истории предыдущих вопросов и ответов.
+        Можно передать предполагаемую историю, чтобы вычислить вопрос заранее.
         """
+        if history is None:
+            history = self.history
 
         # Формирование промпта для нейросети на основе истории
-        prompt = """Ты играешь в игру "Угадай персонажа". Тебе загадали конкретного персонажа, но ты не знаешь его имени.
-Твоя задача - угадать своего персонажа, задавая вопросы, на которые можно ответить только "да" или "нет".
-Каждый вопрос может начинаться с фразы "Мой персонаж" и касаться характеристик персонажа.
-Длина каждого вопроса НЕ МОЖЕТ ПРЕВЫШАТЬ 15 СЛОВ.
-
-**СТРАТЕГИЧЕСКАЯ ЛОГИКА АНАЛИЗА ИСТОРИИ:**
-Перед тем как задать следующий вопрос, проанализируй историю по следующим принципам:
-
-1. **ПРИНЦИП РАСШИРЕНИЯ УСПЕХА (РАЗВИТИЕ "ДА"):**
-   - Если получил ответ "да" на общую категорию - задавай более конкретные вопросы в этой же категории
-   - Пример: "Мой персонаж появляется в фильмах?" → "да" → "Мой персонаж главный герой фильма?" → "да" → "Мой персонаж из голливудских фильмов?"
-
-2. **ПРИНЦИП ИСКЛЮЧЕНИЯ ТУПИКОВ (ИЗБЕГАНИЕ "НЕТ"):**
-   - Если получил ответ "нет" на категорию - полностью исключи эту тему из дальнейших вопросов
-   - Пример: "Мой персонаж историческое лицо?" → "нет" → НЕ задавай вопросов про исторические эпохи, годы жизни и т.д.
-   - Пример: "Мой персонаж из видеоигр?" → "нет" → НЕ задавай вопросов про игровые жанры, платформы, студии разработчиков
-
-3. **ПРИНЦИП ЭФФЕКТИВНОЙ ГРУППИРОВКИ:**
-   - Группируй похожие варианты в один вопрос ТОЛЬКО когда они принадлежат к одной общей категории
-   - Пример правильной группировки: "Мой персонаж спортсмен из футбола, баскетбола или тенниса?"
-   - Пример НЕПРАВИЛЬНОЙ группировки: "Мой персонаж футболист или ученый?" (слишком разные категории)
-
-4. **ПРИНЦИП ДИАГНОСТИЧЕСКИХ ВОПРОСОВ:**
-   - Каждый новый вопрос должен максимально уменьшать количество возможных персонажей
-   - Задавай вопросы, которые проверяют КРИТИЧЕСКИЕ характеристики (те, что делят множество персонажей примерно пополам)
-
-**КРИТИЧЕСКИЙ АНАЛИЗ ИСТОРИИ:**
-Проанализируй историю и ответь себе на вопросы:
-1. Какие категории получили "да"? КАК МОЖНО РАСШИРИТЬ эти темы?
-2. Какие категории получили "нет"? КАК ПОЛНОСТЬЮ ИЗБЕЖАТЬ этих тем?
-3. Есть ли в истории закономерности? Например: несколько "да" в области кино → вероятно, это киноперсонаж
-4. Какие ВАЖНЫЕ характеристики еще не проверены? (пол, профессия, эпоха, страна происхождения, медиасреда)
-
-**СТРАТЕГИЧЕСКИЕ ПРАВИЛА:**
-- НИКОГДА не возвращайся к теме, на которую уже получил "нет"
-- АКТИВНО развивай тему, на которую получил "да"
-- Если в истории много "да" в одной области - углубляйся в эту область
-- Если в истории много "нет" - ищи НОВЫЕ, еще не проверенные категории
-- Избегай вопросов, ответы на которые можно ЛОГИЧЕСКИ вывести из истории
-
-**ФОРМАТ ВОПРОСОВ:**
-- Вопрос: начинается с "Мой персонаж..." и заканчивается "?"
-- Угадывание: начинается с "Я ...!" и заканчивается "!"
-"""
-
-        if self.history:
-            prompt += "\n\n**ИСТОРИЯ ПРЕДЫДУЩИХ ВОПРОСОВ И ОТВЕТОВ:**\n"
-            for i, (question, answer) in enumerate(self.history, 1):
-                prompt += f"{i}. Вопрос: {question}\n   Ответ, который ты получал ранее на этот вопрос: {answer}\n"
-
-            # Добавляем анализ эффективности
-            prompt += "\n**АНАЛИЗ ИСТОРИИ И СТРАТЕГИЧЕСКИЕ ВЫВОДЫ:**\n"
-            prompt += "Проанализируй всю историю выше и сделай выводы:\n"
-            prompt += "1. Какие характеристики персонажа уже точно известны?\n"
-            prompt += "2. Какие категории персонажей уже исключены?\n"
-            prompt += "3. Какую информацию можно извлечь из ответов 'да' и 'нет'?\n"
-            prompt += "4. Какие темы/категории требуют дополнительного уточнения?\n"
-            prompt += "5. Исходя из истории, какие персонажи могут быть вероятными кандидатами?\n\n"
-
-            prompt += "**ПРАВИЛО АНАЛИЗА:**"
-            prompt += "Не задавай вопросы, на которые ответ уже содержится в истории (явно или косвенно). "
-
-        prompt += """\n**ПРИНЯТЬ РЕШЕНИЕ НА ОСНОВЕ АНАЛИЗА ИСТОРИИ:**
-    1. Если анализ истории дает тебе достаточно информации для точного предположения - попробуй угадать персонажа (используя формат "Я [имя]!")
-    2. Если информации из истории недостаточно для точного угадывания - задай следующий стратегический вопрос (начиная с "Мой персонаж")
-
-    **РЕШЕНИЕ О ВОПРОСЕ ИЛИ УГАДЫВАНИИ:**
-- Угадывай ТОЛЬКО если можешь назвать КОНКРЕТНОГО персонажа, который очень соответствует многим "да" и малому числу "нет" из истории
-- Если есть хоть одно несоответствие - задавай уточняющий вопрос
-- Ответы на запросы могут иногда врать, но такие случаи редки
-
-    Верни ответ ТОЛЬКО в формате JSON без каких-либо дополнительных пояснений:
-    {"question": "твой_вопрос_или_предположение_здесь", "is_guess": 0 или 1}"""
+        prompt = self.prompt_builder.build(history)
 
         try:
             # Отправка запроса к модели
@@ -126,12 +59,12 @@ class BotPlayer:
                 },
                 "required": ["question", "is_guess"],
             }
-            response = AI_client.chat.completions.create(
-                model=f"gpt://{YANDEX_CLOUD_FOLDER}/yandexgpt/latest",
+            response_text = await self.llm.complete(
+                "yandexgpt",
                 messages=[
                     {
                         "role": "system",
-                        "content": "Ты - стратегический игрок в игре 'Угадай персонажа'. Твоя главная задача - тщательно анализировать историю предыдущих вопросов и ответов. Каждое твое решение должно основываться на анализе всей накопленной информации. Используй стратегию бинарного поиска, группировки и логических выводов из истории.",
+                        "content": SYSTEM_PROMPT,
                     },
                     {"role": "user", "content": prompt},
                 ],
@@ -141,9 +74,6 @@ class BotPlayer:
                 response_format={"type": "json_schema", "json_schema": json_schema},
             )
 
-            # Извлечение текста ответа
-            response_text = response.choices[0].message.content.strip()
-
             # Извлечение JSON из ответа
             start_idx = response_text.find('{')
             end_idx = response_text.rfind('}') + 1
@@ -195,10 +125,14 @@ class BotPlayer:
                 **{"question": "Мой персонаж мужского пола?", "is_guess": 0}
             )
 
-    def ans_for_question(self, role: str, question: str) -> bool:
+    async def ans_for_question(self, role: str, question: str) -> bool:
         """
         Ответ нейросети на вопрос пользователя о загаданном персонаже.
         """
+        if self.answer_cache:
+            cached = self.answer_cache.get(role, question)
+            if cached is not None:
+                return cached
 
         # Формируем промпт для нейросети
         prompt = f"""Ты играешь в игру "Угадай персонажа". 
@@ -242,9 +176,9 @@ class BotPlayer:
     Твой ответ:"""
 
         try:
-            # Отправляем запрос к модели Mistral через OpenRouter
-            response = AI_client.chat.completions.create(
-                model=f"gpt://{YANDEX_CLOUD_FOLDER}/qwen3-235b-a22b-fp8/latest",  # Используем доступную модель Mistral
+            # Отправляем запрос к модели
+            answer_text = await self.llm.complete(
+                "qwen3-235b-a22b-fp8",
                 messages=[
                     {
                         "role": "system",
@@ -256,39 +190,48 @@ class BotPlayer:
                 max_tokens=10,  # Ограничиваем длину ответа
             )
 
-            # Получаем ответ
-            answer_text = response.choices[0].message.content.strip().lower()
+            answer_text = answer_text.lower()
 
             # Преобразуем ответ в булево значение
             if answer_text.startswith('да'):
-                return True
+                answer = True
             elif answer_text.startswith('нет'):
-                return False
+                answer = False
             else:
                 # Если ответ не распознан, пытаемся найти ключевые слова
                 if any(
                     word in answer_text
                     for word in ['yes', 'true', 'верно', 'правильно', 'correct']
                 ):
-                    return True
+                    answer = True
                 elif any(
                     word in answer_text
                     for word in ['no', 'false', 'неверно', 'неправильно', 'incorrect']
                 ):
-                    return False
+                    answer = False
                 else:
                     # По умолчанию возвращаем False при неоднозначном ответе
                     print(f"Неоднозначный ответ от нейросети: '{answer_text}'")
                     return False
 
+            # Запоминаем ответ для остальных ботов и следующих игр
+            if self.answer_cache:
+                self.answer_cache.put(role, question, answer)
+            return answer
+
         except Exception as e:
             print(f"Ошибка при обращении к API: {e}")
             # Возвращаем False в случае ошибки
             return False
 
+    @staticmethod
+    def make_fact(question: str, answer: bool) -> Tuple[str, str]:
+        """Запись истории для вопроса и результата голосования"""
+        return question, "Да" if answer else "Нет"
+
     def add_fact(self, question: str, answer: bool):
         """Добавляет известный факт в историю"""
-        self.history.append((question, "Да" if answer else "Нет"))
+        self.history.append(self.make_fact(question, answer))
 
     def to_dict(self) -> Dict[str, Any]:
         """Конвертация в словарь"""
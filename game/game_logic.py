@@ -1,32 +1,30 @@
+import asyncio
 import json
-import os
 import random
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 
-from dotenv import load_dotenv
-from openai import OpenAI
 from telegram import Update
 from telegram.ext import ContextTypes
 
+from config import BOT_PREFETCH, BOT_VOTE_CONCURRENCY, BOT_VOTE_TIMEOUT
 from database_manager import DatabaseManager
+from game.answer_cache import AnswerCache
 from game.bot_player import BotPlayer
 from game.game_state import GameState, GameStatus
 from game.game_manager import GameStorageManager
 from game.game_notifier import GameNotifier
+from game.game_snapshot import GameSnapshot
+from game.llm_client import LLMClient
+from game.question_prefetch import QuestionPrefetcher
+from game.role_catalog import RoleCatalog
+from game.role_pool import RolePool
+from game.turn_scheduler import TurnScheduler
+from game.theme_cache import ThemeCache
 from lobby.lobby_manager import LobbyManager
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-YANDEX_CLOUD_FOLDER = os.getenv("YANDEX_CLOUD_FOLDER")
-YANDEX_CLOUD_API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
-AI_client = OpenAI(
-    api_key=YANDEX_CLOUD_API_KEY,
-    base_url="https://llm.api.cloud.yandex.net/v1",
-    project=YANDEX_CLOUD_FOLDER,
-)
-
 
 class GameLogic:
     """Основная игровая логика - координация всех компонентов"""
@@ -56,8 +54,16 @@ class GameLogic:
         self.lobby_manager = lobby_manager
         self.storage = GameStorageManager(db_manager)
         self.notifier = GameNotifier()
+        self.llm = LLMClient()
+        self.answer_cache = AnswerCache()
+        self.theme_cache = ThemeCache(db_manager, self.storage.journal)
+        self.role_catalog = RoleCatalog()
+        self.role_pool = RolePool(self._generate_pool_roles)
 
         self.bots: Dict[int, Dict[int, BotPlayer]] = {}
+        self.scheduler = TurnScheduler()
+        self.prefetcher = QuestionPrefetcher()
+        self.snapshot = GameSnapshot(self.snapshot_games)
 
         # для совместимости с текущим кодом
         self.active_games = self.storage.active_games
@@ -65,9 +71,10 @@ class GameLogic:
         self._initialized = True
 
     # ===== Инициализация игры =====
-    def load_roles(self, num_players: int, theme) -> List[str]:
+    async def generate_roles(self, num_players: int, theme) -> List[str]:
         """
         Генерирует список персонажей для игры "Угадай кто я" через YandexGPT API.
+        Вызывается пулом ролей в фоне, ошибки API пробрасываются.
         """
 
         prompt = f"""Ты должен сгенерировать список из {num_players} уникальных персонажей для игры "Угадай кто я".
@@ -125,115 +132,114 @@ class GameLogic:
         Сгенерируй {num_players} разнообразных и интересных персонажей для игры.
         """
 
-        try:
-            json_schema = {
-                "type": "object",
-                "properties": {
-                    "characters": {
-                        "type": "array",
-                        "items": {
-                            "type": "string",
-                            "description": "Имя персонажа для игры 'Угадай кто я'",
-                        },
-                        "minItems": num_players,
-                        "maxItems": num_players,
-                    }
-                },
-            }
-
-            # Отправка запроса к YandexGPT
-            response = AI_client.chat.completions.create(
-                model=f"gpt://{YANDEX_CLOUD_FOLDER}/yandexgpt/latest",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Ты - генератор персонажей для игры 'Угадай кто я'. Твоя задача - создавать разнообразные, интересные и достаточно известные персонажи из разных категорий.",
+        json_schema = {
+            "type": "object",
+            "properties": {
+                "characters": {
+                    "type": "array",
+                    "items": {
+                        "type": "string",
+                        "description": "Имя персонажа для игры 'Угадай кто я'",
                     },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=1,
-                max_tokens=1000,
-                stream=False,
-                response_format={"type": "json_schema", "json_schema": json_schema},
-            )
+                    "minItems": num_players,
+                    "maxItems": num_players,
+                }
+            },
+        }
 
-            # Извлечение JSON из ответа
-            response_text = response.choices[0].message.content.strip()
+        # Отправка запроса к YandexGPT
+        response_text = await self.llm.complete(
+            "yandexgpt",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "Ты - генератор персонажей для игры 'Угадай кто я'. Твоя задача - создавать разнообразные, интересные и достаточно известные персонажи из разных категорий.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            temperature=1,
+            max_tokens=1000,
+            stream=False,
+            response_format={"type": "json_schema", "json_schema": json_schema},
+        )
 
-            characters = json.loads(response_text)["characters"]
+        # Извлечение JSON из ответа
+        characters = json.loads(response_text)["characters"]
 
-            # Проверяем, что получили правильное количество персонажей
-            if len(characters) != num_players:
-                logger.warning(
-                    f"Предупреждение: получено {len(characters)} персонажей вместо {num_players}"
-                )
-                # Догенерируем недостающих персонажей локально
-                if len(characters) < num_players:
-                    characters += random.sample(
-                        self._generate_backup_characters(),
-                        num_players - len(characters),
-                    )
-                else:
-                    characters = characters[:num_players]
+        # Проверяем, что получили правильное количество персонажей
+        if len(characters) != num_players:
+            logger.warning(
+                f"Предупреждение: получено {len(characters)} персонажей вместо {num_players}"
+            )
+            characters = characters[:num_players]
 
-            return characters
+        return characters
 
-        except Exception as e:
-            logger.error(f"Ошибка при генерации персонажей через API: {e}")
-            logger.info("Используем резервный список персонажей...")
-            return random.sample(self._generate_backup_characters(), num_players)
+    async def _generate_pool_roles(self, num_players: int, theme) -> List[str]:
+        """Генерация для пула ролей с сохранением персонажей темы в кэш"""
+        characters = await self.generate_roles(num_players, theme)
+        if theme:
+            await self.theme_cache.add(
+                theme,
+                [role for role in map(RolePool.validate_role, characters) if role],
+            )
+        return characters
 
-    def _generate_backup_characters(self) -> List[str]:
-        """Загрузка ролей из файла"""
-        try:
-            with open('data/roles.json', 'r', encoding='utf-8') as f:
-                roles = json.load(f)
-            return roles
-        except FileNotFoundError:
-            logger.error("Файл roles.json не найден")
-            return [
-                "Гарри Поттер",
-                "Шерлок Холмс",
-                "Супермен",
-                "Человек-паук",
-                "Дарт Вейдер",
-                "Эльза",
-                "Марио",
-                "Сонька Золотая Ручка",
-                "Бэтмен",
-                "Черепашка-ниндзя",
-                "Джеймс Бонд",
-                "Индиана Джонс",
-                "Джокер",
-                "Халк",
-                "Терминатор",
-                "Нео",
-                "Фродо Бэггинс",
-                "Ариадна",
+    async def distribute_roles(self, num_players: int, theme) -> Tuple[List[str], bool]:
+        """
+        Распределение ролей между игроками из пула. Возвращает роли и признак,
+        что все они по теме (иначе недостающие взяты из резервного списка).
+        """
+        selected_roles = self.role_pool.take(theme, num_players)
+
+        # Тема уже встречалась - добираем из кэша тем
+        if len(selected_roles) < num_players and theme:
+            taken = {role.casefold() for role in selected_roles}
+            cached_roles = [
+                role
+                for role in await self.theme_cache.get(theme)
+                if role.casefold() not in taken
             ]
-        except json.JSONDecodeError:
-            logger.error("Ошибка чтения roles.json")
-            return []
+            selected_roles += random.sample(
+                cached_roles, min(len(cached_roles), num_players - len(selected_roles))
+            )
 
-    def distribute_roles(self, num_players: int, theme) -> List[str]:
-        """Распределение ролей между игроками"""
-        all_roles = self.load_roles(num_players, theme)
+        # Новая тема - недолго ждем первую партию от LLM
+        if len(selected_roles) < num_players and theme:
+            missing = num_players - len(selected_roles)
+            await self.role_pool.wait_for_roles(theme, missing)
+            selected_roles += self.role_pool.take(theme, missing)
 
-        if len(all_roles) < num_players:
+        themed = len(selected_roles) >= num_players or not theme
+        if len(selected_roles) < num_players:
             logger.warning(
-                f"Недостаточно ролей. Нужно {num_players}, есть {len(all_roles)}"
+                f"В пуле ролей {len(selected_roles)} из {num_players} персонажей, "
+                "используем резервный список"
             )
-            # Дублируем роли если недостаточно
-            all_roles = all_roles * (num_players // len(all_roles) + 1)
+            missing = num_players - len(selected_roles)
+            backup_roles = self.role_catalog.sample(missing, exclude=selected_roles)
 
-        selected_roles = random.sample(all_roles, num_players)
-        return selected_roles
+            if len(backup_roles) < missing:
+                logger.warning(
+                    f"Недостаточно ролей. Нужно {missing}, есть {len(backup_roles)}"
+                )
+                # Дублируем роли если недостаточно
+                backup_roles += random.choices(
+                    self.role_catalog.roles or selected_roles,
+                    k=missing - len(backup_roles),
+                )
+
+            selected_roles += backup_roles
+
+        return selected_roles, themed
 
-    def start_game_session(self, lobby_id: int, theme: str = None) -> Dict[str, Any]:
+    async def start_game_session(
+        self, lobby_id: int, theme: str = None
+    ) -> Dict[str, Any]:
         """Начинает игровую сессию"""
         try:
             # Получаем информацию о лобби
-            lobby_info = self.lobby_manager.get_lobby_info(lobby_id)
+            lobby_info = await self.lobby_manager.get_lobby_info(lobby_id)
             if not lobby_info:
                 return {"success": False, "message": "Лобби не найдено"}
 
@@ -241,7 +247,7 @@ class GameLogic:
             player_ids = [player['user_id'] for player in lobby_info.players]
 
             # Распределяем роли
-            roles_list = self.distribute_roles(num_players, theme)
+            roles_list, theme_applied = await self.distribute_roles(num_players, theme)
             random.shuffle(roles_list)
 
             # Создаем словарь player_id -> role
@@ -260,22 +266,14 @@ class GameLogic:
             # Создаем состояние игры
             game_state = self.storage.create_game(lobby_id, roles_dict)
 
-            # TODO: вынести в game_manager
             # Обновляем статус лобби
-            self.lobby_manager.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET status = 'playing'
-                WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
-            self.lobby_manager.db._connection.commit()
+            await self.lobby_manager.set_lobby_status(lobby_id, 'playing')
 
             return {
                 "success": True,
                 "message": "Игра началась",
                 "game_state": game_state,
+                "theme_applied": theme_applied,
             }
 
         except Exception as e:
@@ -317,13 +315,14 @@ class GameLogic:
             return
 
         # Сохраняем вопрос в историю
-        question_id = self.storage.save_question_history(
+        question_id = await self.storage.save_question_history(
             game_state.lobby_id, user_id, question
         )
 
         # Начинаем голосование
         player_role = game_state.get_player_role(user_id)
-        game_state.start_vote(question, user_id)
+        game_state.start_vote(question, user_id, question_id)
+        self.prefetch_next_question(game_state)
 
         # Рассылаем вопрос для голосования
         success = await self.notifier.send_vote_question(
@@ -334,9 +333,12 @@ class GameLogic:
             await update.message.reply_text(
                 "✅ Ваш вопрос отправлен другим игрокам!\n" "Ждем ответов..."
             )
-            # обрабатывает голоса ботов
-            await self.process_bot_votes(
-                context, game_state, user_id, question, player_role
+            # голоса ботов обрабатываются в очереди лобби, обработчик не ждет LLM
+            self.scheduler.schedule(
+                game_state.lobby_id,
+                lambda: self.process_bot_votes(
+                    context, game_state, user_id, question, player_role
+                ),
             )
         else:
             await update.message.reply_text(
@@ -393,15 +395,11 @@ class GameLogic:
         if not game_state.current_vote:
             return
         question = game_state.current_vote.question
-        question_owner_id = game_state.current_vote.question_owner_id
 
         # Обновляем результаты в истории
-        # Находим ID последнего вопроса этого игрока
-        history = self.storage.get_player_question_history(
-            question_owner_id, game_state.lobby_id, limit=1
-        )
-        if history:
-            self.storage.update_question_votes(history[0]["id"], yes_votes, no_votes)
+        question_id = game_state.current_vote.question_id
+        if question_id is not None:
+            self.storage.update_question_votes(question_id, yes_votes, no_votes)
 
         # Определяем результат
         majority_yes = yes_votes > no_votes
@@ -425,7 +423,7 @@ class GameLogic:
             context, game_state, question, yes_votes, no_votes, majority_yes
         )
         if player and player < 0:
-            await self.process_bot_turn(context, game_state, player)
+            self.schedule_bot_turn(context, game_state, player)
         else:
             await self.notifier.send_turn_notification(context, game_state, player)
 
@@ -462,9 +460,11 @@ class GameLogic:
 
                 # Передаем ход следующему
                 if next_player and next_player < 0:
-                    await self.process_bot_turn(context, game_state, next_player)
+                    self.schedule_bot_turn(context, game_state, next_player)
                 else:
-                    await self.notifier.send_turn_notification(context, game_state, next_player)
+                    await self.notifier.send_turn_notification(
+                        context, game_state, next_player
+                    )
 
     async def end_game(
         self,
@@ -478,43 +478,56 @@ class GameLogic:
             return
 
         winner_role = game_state.get_player_role(winner_id)
+        game_state.finish_game(winner_id)
 
         # Рассылаем уведомление о завершении
         await self.notifier.send_game_end_notification(
             context, game_state, winner_id, winner_role
         )
-        # TODO: вынести в game_manager
         # Обновляем статус лобби в БД
-        self.lobby_manager.db.cursor.execute(
-            """
-            UPDATE lobbies
-            SET status = 'waiting'
-            WHERE lobby_id = ?
-            """,
-            (game_state.lobby_id,),
-        )
+        await self.lobby_manager.set_lobby_status(game_state.lobby_id, 'waiting')
 
         # Очищаем роли
         self.storage.clear_player_roles(game_state.lobby_id)
 
-        # Очищаем историю вопросов
+        # Очищаем историю вопросов и журнал событий игры
         self.storage.cleanup_game_history(game_state.lobby_id)
+        self.storage.cleanup_game_log(game_state.lobby_id)
+        await self.storage.flush()
 
-        # Очищаем ботов для этого лобби
+        # Отменяем оставшиеся ходы ботов и очищаем ботов для этого лобби
+        self.scheduler.cancel(game_state.lobby_id)
+        self.prefetcher.discard(game_state.lobby_id)
         if game_state.lobby_id in self.bots:
             del self.bots[game_state.lobby_id]
 
         # Удаляем состояние игры из памяти
         self.storage.remove_game(game_state.lobby_id)
 
-        self.lobby_manager.db._connection.commit()
-
     # ===== Обработка хода бота =====
 
+    def schedule_bot_turn(
+        self, context: ContextTypes.DEFAULT_TYPE, game_state: GameState, bot_id: int
+    ):
+        """Ставит ход бота в очередь лобби, не дожидаясь его выполнения"""
+        self.scheduler.schedule(
+            game_state.lobby_id,
+            lambda: self.process_bot_turn(context, game_state, bot_id),
+        )
+
     async def process_bot_turn(
         self, context: ContextTypes.DEFAULT_TYPE, game_state: GameState, bot_id: int
     ):
         """Обработка хода бота"""
+        # Пока ход ждал в очереди, игра могла закончиться или ход смениться
+        if (
+            self.storage.get_game(game_state.lobby_id) is not game_state
+            or game_state.get_current_player() != bot_id
+            or game_state.current_vote
+        ):
+            logger.info(f"Ход бота {bot_id} в лобби {game_state.lobby_id} устарел")
+            return
+
         bot = self.bots.get(game_state.lobby_id, {}).get(bot_id)
         logger.info(f"AI bot {bot_id} turn")
         if not bot:
@@ -522,8 +535,8 @@ class GameLogic:
             return
 
         try:
-            # Бот задает вопрос
-            response = bot.ask()
+            # Бот задает вопрос (возможно, вычисленный заранее)
+            response = await self.prefetcher.ask(game_state.lobby_id, bot)
 
             if response.is_guess:
                 # Бот делает предположение
@@ -535,13 +548,14 @@ class GameLogic:
                 question = response.question
 
                 # Сохраняем вопрос в историю
-                question_id = self.storage.save_question_history(
+                question_id = await self.storage.save_question_history(
                     game_state.lobby_id, bot_id, question
                 )
 
                 # Начинаем голосование
                 player_role = game_state.get_player_role(bot_id)
-                game_state.start_vote(question, bot_id)
+                game_state.start_vote(question, bot_id, question_id)
+                self.prefetch_next_question(game_state)
 
                 # Рассылаем вопрос для голосования
                 success = await self.notifier.send_vote_question(
@@ -557,6 +571,36 @@ class GameLogic:
         except Exception as e:
             logger.error(f"Ошибка обработки хода бота {bot_id}: {e}")
 
+    def prefetch_next_question(self, game_state: GameState):
+        """
+        Пока идет голосование, заранее вычисляет вопрос бота,
+        который будет ходить после него, для обоих исходов
+        """
+        if not BOT_PREFETCH or not game_state.current_vote:
+            return
+
+        bots = self.bots.get(game_state.lobby_id, {})
+        question = game_state.current_vote.question
+        owner_id = game_state.current_vote.question_owner_id
+
+        # «Да» - спрашивающий ходит еще раз
+        if owner_id in bots:
+            bot = bots[owner_id]
+            self.prefetcher.prefetch(
+                game_state.lobby_id,
+                bot,
+                bot.history + [BotPlayer.make_fact(question, True)],
+            )
+
+        # «Нет» - ход переходит следующему игроку
+        next_id = game_state.peek_next_player()
+        if next_id in bots:
+            bot = bots[next_id]
+            history = bot.history
+            if next_id == owner_id:
+                history = history + [BotPlayer.make_fact(question, False)]
+            self.prefetcher.prefetch(game_state.lobby_id, bot, history)
+
     async def process_bot_votes(
         self,
         context: ContextTypes.DEFAULT_TYPE,
@@ -566,7 +610,8 @@ class GameLogic:
         target_role: str,
     ):
         """Обработка голосования ботов"""
-        # Получаем всех игроков
+        vote = game_state.current_vote
+        voters = []
         for player_id in game_state.get_all_players():
             if player_id == asking_bot_id:
                 continue  # Бот не голосует за свой вопрос
@@ -576,17 +621,52 @@ class GameLogic:
 
             bot = self.bots.get(game_state.lobby_id, {}).get(player_id)
             if bot:
-                # Бот отвечает на вопрос
-                answer = bot.ans_for_question(target_role, question)
-                vote_type = "yes" if answer else "no"
+                voters.append(bot)
+
+        # Боты отвечают на вопрос параллельно
+        semaphore = asyncio.Semaphore(BOT_VOTE_CONCURRENCY)
+        answers = await asyncio.gather(
+            *(
+                self._get_bot_answer(bot, target_role, question, semaphore)
+                for bot in voters
+            )
+        )
+
+        # Пока боты думали, голосование могло закончиться (например, выход игрока)
+        if game_state.current_vote is not vote:
+            return
 
-                # Добавляем голос
-                game_state.add_vote(player_id, vote_type)
+        for bot, answer in zip(voters, answers):
+            # Добавляем голос
+            game_state.add_vote(bot.id, "yes" if answer else "no")
 
         # Проверяем, все ли проголосовали
         if game_state.is_voting_complete():
             await self.announce_results(context, game_state)
 
+    async def _get_bot_answer(
+        self,
+        bot: BotPlayer,
+        target_role: str,
+        question: str,
+        semaphore: asyncio.Semaphore,
+    ) -> bool:
+        """Ответ бота с ограничением по времени, при ошибке - «нет»"""
+        # Время на ответ отсчитывается с момента, когда бот получил слот,
+        # а не с ожидания своей очереди к LLM
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    bot.ans_for_question(target_role, question), BOT_VOTE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f"Бот {bot.id} не успел проголосовать, засчитываем «нет»"
+                )
+            except Exception as e:
+                logger.error(f"Ошибка голосования бота {bot.id}: {e}")
+        return False
+
     async def process_bot_final_guess(
         self,
         context: ContextTypes.DEFAULT_TYPE,
@@ -617,7 +697,7 @@ class GameLogic:
 
                 # Проверяем, не бот ли следующий
                 if next_player < 0:
-                    await self.process_bot_turn(context, game_state, next_player)
+                    self.schedule_bot_turn(context, game_state, next_player)
                 else:
                     await self.notifier.send_turn_notification(
                         context, game_state, next_player
@@ -678,13 +758,17 @@ class GameLogic:
         context: ContextTypes.DEFAULT_TYPE,
         lobby_id: int,
         exiting_player_id: int,
-        exit_info: Dict[str, Any],
     ) -> Dict[str, Any]:
-        """Обработка выхода игрока после сбора информации"""
+        """Обработка выхода игрока после его удаления из лобби в БД"""
         game_state = self.storage.get_game(lobby_id)
-        if not game_state:
+        if not game_state or not game_state.has_player(exiting_player_id):
             return {"end_game": False}
 
+        # Пока шла запись в БД, ходы и голоса ботов могли изменить игру:
+        # очередь хода и голос игрока берем из текущего состояния, без await
+        # до удаления игрока из него
+        exit_info = self.prepare_player_exit(lobby_id, exiting_player_id)
+
         result: Dict[str, Any] = {"end_game": False}
 
         # Обрабатываем сценарии
@@ -696,11 +780,10 @@ class GameLogic:
             result["next_player"] = game_state.get_current_player()
 
         # Удаляем игрока из состояния
-        game_state.remove_player(exiting_player_id, result["next_player"])
+        self.storage.remove_player(lobby_id, exiting_player_id, result["next_player"])
 
         if exit_info.get("had_voted"):
-            del game_state.current_vote.votes[exiting_player_id]
-            game_state.current_vote.total_players -= 1
+            game_state.withdraw_vote(exiting_player_id)
 
         # Проверяем, остался ли 1 игрок
         if game_state.get_player_count() == 1:
@@ -708,12 +791,25 @@ class GameLogic:
             winner_id = game_state.get_all_players()[0]
             result["winner_id"] = winner_id
             result["winner_role"] = game_state.get_player_role(winner_id)
+            game_state.finish_game(winner_id)
 
         # Отправляем уведомления
         await self.notifier.send_player_exit_notification(
             context, game_state, exiting_player_id, exit_info, result
         )
 
+        if result["end_game"]:
+            # Игра окончена - запланированные ходы ботов больше не нужны
+            self.scheduler.cancel(lobby_id)
+            self.prefetcher.discard(lobby_id)
+        elif (
+            exit_info.get("was_current_player")
+            and (result.get("next_player") or 0) < 0
+            and not game_state.current_vote
+        ):
+            # Ход перешел к боту
+            self.schedule_bot_turn(context, game_state, result["next_player"])
+
         # Если все проголосовали, объявляем результаты
         if game_state.status == GameStatus.VOTING and game_state.is_voting_complete():
             await self.announce_results(context, game_state)
@@ -724,7 +820,7 @@ class GameLogic:
     def create_bot_player(self, lobby_id: int, bot_index: int, role: str) -> BotPlayer:
         """Создание бота-игрока"""
         # Используем отрицательные ID для ботов
-        bot = BotPlayer(bot_index, role)
+        bot = BotPlayer(bot_index, role, self.llm, self.answer_cache)
 
         # Сохраняем бота в общем хранилище
         if lobby_id not in self.bots:
@@ -733,6 +829,97 @@ class GameLogic:
 
         return bot
 
+    # ===== Снимки игр =====
+
+    def snapshot_games(self) -> List[Dict[str, Any]]:
+        """Записи об активных играх и их ботах для снимка"""
+        return [
+            {
+                "game": game_state.to_dict(),
+                "bots": [bot.to_dict() for bot in self.bots.get(lobby_id, {}).values()],
+            }
+            for lobby_id, game_state in self.storage.active_games.items()
+        ]
+
+    async def restore_games(self) -> List[int]:
+        """
+        Восстановление игр из снимка. Игра восстанавливается, только если
+        лобби все еще в игре и в нем остались все ее игроки; остальные
+        прерванные игры сбрасываются.
+        """
+        restored = []
+        for record in await self.snapshot.load():
+            try:
+                game_state = GameState.from_dict(record["game"])
+                lobby_id = game_state.lobby_id
+                bots = {data["id"]: data for data in record["bots"]}
+
+                lobby_info = await self.lobby_manager.get_lobby_info(lobby_id)
+                lobby_players = (
+                    {player["user_id"] for player in lobby_info.players}
+                    if lobby_info
+                    else set()
+                )
+                player_ids = set(game_state.get_all_players())
+                if (
+                    not lobby_info
+                    or lobby_info.status != 'playing'
+                    or not player_ids <= lobby_players
+                    or any(user_id not in bots for user_id in player_ids if user_id < 0)
+                ):
+                    logger.warning(f"Игра в лобби {lobby_id} из снимка устарела")
+                    continue
+
+                for bot_id, data in bots.items():
+                    bot = self.create_bot_player(lobby_id, bot_id, data["role"])
+                    bot.assigned_role = data["role"]
+                    bot.history = [tuple(fact) for fact in data["history"]]
+
+                self.storage.restore_game(game_state)
+                restored.append(lobby_id)
+            except Exception as e:
+                logger.error(f"Ошибка восстановления игры из снимка: {e}")
+
+        # Сброс прерванных игр идет мимо журнала - сначала записываем журнал
+        await self.storage.flush()
+        reset = await self.lobby_manager.reset_interrupted_games(restored)
+        logger.info(
+            f"Восстановлено игр: {len(restored)}, сброшено прерванных: {len(reset)}"
+        )
+        return restored
+
+    def resume_games(
+        self, context: ContextTypes.DEFAULT_TYPE, lobby_ids: List[int]
+    ) -> None:
+        """Продолжение ходов и голосований ботов в восстановленных играх"""
+        for lobby_id in lobby_ids:
+            game_state = self.storage.get_game(lobby_id)
+            if game_state:
+                self._resume_game(context, game_state)
+
+    def _resume_game(
+        self, context: ContextTypes.DEFAULT_TYPE, game_state: GameState
+    ) -> None:
+        vote = game_state.current_vote
+        if vote:
+            # Боты могли не успеть проголосовать до перезапуска
+            owner_id = vote.question_owner_id
+            self.scheduler.schedule(
+                game_state.lobby_id,
+                lambda: self.process_bot_votes(
+                    context,
+                    game_state,
+                    owner_id,
+                    vote.question,
+                    game_state.get_player_role(owner_id),
+                ),
+            )
+            return
+
+        current = game_state.get_current_player()
+        if current is not None and current < 0:
+            self.schedule_bot_turn(context, game_state, current)
+
     # ===== Вспомогательные методы =====
 
     def get_current_player(self, lobby_id: int) -> Optional[int]:
@@ -756,7 +943,9 @@ class GameLogic:
             return
 
         # Получаем историю
-        history = self.storage.get_player_question_history(user_id, game_state.lobby_id)
+        history = await self.storage.get_player_question_history(
+            user_id, game_state.lobby_id
+        )
 
         if not history:
             await update.message.reply_text(
@@ -1,8 +1,11 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+import json
 import logging
 
-from game.game_state import GameState, GameStatus
-from database_manager import DatabaseManager
+from config import GAME_CHECKPOINT_EVERY
+from game.game_state import Event, GameState
+from game.write_journal import WriteJournal
+from database_manager import DatabaseManager, run_in_db_thread
 
 logger = logging.getLogger(__name__)
 
@@ -13,96 +16,190 @@ class GameStorageManager:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
         self.active_games: Dict[int, GameState] = {}
+        # Обратный индекс user_id -> lobby_id (только живые игроки, у ботов
+        # отрицательные ID повторяются в разных лобби)
+        self._player_games: Dict[int, int] = {}
+        # Отложенная запись истории вопросов и ролей
+        self.journal = WriteJournal(db_manager)
 
     # ===== Работа с активными играми (in-memory) =====
 
     def create_game(self, lobby_id: int, players_data: Dict[int, str]) -> GameState:
         """Создание новой игровой сессии"""
-        game_state = GameState(lobby_id)
-        game_state.status = GameStatus.PLAYING
+        # Журнал прошлой игры этого лобби больше не нужен
+        self.cleanup_game_log(lobby_id)
 
+        game_state = GameState(lobby_id)
+        game_state.listener = self._record_event
         for user_id, role in players_data.items():
             game_state.add_player(user_id, role)
+        game_state.start_game()
 
-        self.active_games[lobby_id] = game_state
+        self.add_game(game_state)
         return game_state
 
+    def restore_game(self, game_state: GameState) -> None:
+        """
+        Регистрация игры, восстановленной из снимка: события журнала
+        новее снимка отбрасываются, журнал продолжается с его состояния
+        """
+        self.journal.append(
+            "DELETE FROM game_events WHERE lobby_id = ? AND seq > ?",
+            (game_state.lobby_id, game_state.seq),
+        )
+        self._checkpoint(game_state)
+        self.add_game(game_state)
+
+    def add_game(self, game_state: GameState) -> None:
+        """Регистрация готового состояния игры"""
+        game_state.listener = self._record_event
+        self.active_games[game_state.lobby_id] = game_state
+        for user_id in game_state.get_all_players():
+            self._index_player(user_id, game_state.lobby_id)
+
     def get_game(self, lobby_id: int) -> Optional[GameState]:
         """Получение состояния игры"""
         return self.active_games.get(lobby_id)
 
     def remove_game(self, lobby_id: int) -> bool:
         """Удаление игры из памяти"""
-        if lobby_id in self.active_games:
-            del self.active_games[lobby_id]
-            return True
-        return False
+        game_state = self.active_games.pop(lobby_id, None)
+        if game_state is None:
+            return False
+
+        for user_id in game_state.get_all_players():
+            self._unindex_player(user_id, lobby_id)
+        return True
+
+    def remove_player(self, lobby_id: int, user_id: int, next_player: int) -> bool:
+        """Удаление игрока из игры с обновлением индекса"""
+        game_state = self.active_games.get(lobby_id)
+        if game_state is None:
+            return False
+
+        removed = game_state.remove_player(user_id, next_player)
+        self._unindex_player(user_id, lobby_id)
+        return removed
 
     def get_game_by_player(self, user_id: int) -> Optional[GameState]:
         """Поиск игры по ID игрока"""
-        for game_state in self.active_games.values():
-            if game_state.has_player(user_id):
-                return game_state
-        return None
+        lobby_id = self._player_games.get(user_id)
+        if lobby_id is None:
+            return None
+
+        game_state = self.active_games.get(lobby_id)
+        if game_state is None or not game_state.has_player(user_id):
+            # Игрока удалили в обход хранилища - чиним индекс
+            self._unindex_player(user_id, lobby_id)
+            return None
+        return game_state
+
+    def _index_player(self, user_id: int, lobby_id: int) -> None:
+        if user_id < 0:
+            return
+
+        previous = self._player_games.get(user_id)
+        if previous is not None and previous != lobby_id:
+            logger.warning(
+                f"Игрок {user_id} переходит из игры {previous} в игру {lobby_id}"
+            )
+        self._player_games[user_id] = lobby_id
+
+    def _unindex_player(self, user_id: int, lobby_id: int) -> None:
+        if self._player_games.get(user_id) == lobby_id:
+            del self._player_games[user_id]
+
+    def check_consistency(self) -> List[str]:
+        """
+        Сверка индекса игроков с активными играми.
+        Возвращает список найденных расхождений (пустой - все в порядке).
+        """
+        problems = []
+        for user_id, lobby_id in self._player_games.items():
+            game_state = self.active_games.get(lobby_id)
+            if game_state is None:
+                problems.append(
+                    f"игрок {user_id} ссылается на удаленную игру {lobby_id}"
+                )
+            elif not game_state.has_player(user_id):
+                problems.append(f"игрока {user_id} нет в игре {lobby_id}")
+
+        for lobby_id, game_state in self.active_games.items():
+            for user_id in game_state.get_all_players():
+                if user_id > 0 and self._player_games.get(user_id) != lobby_id:
+                    problems.append(f"игрок {user_id} из игры {lobby_id} не в индексе")
+        return problems
 
     # ===== Работа с историей вопросов (БД) =====
 
-    def save_question_history(
+    async def save_question_history(
+        self, lobby_id: int, user_id: int, question_text: str
+    ) -> Optional[int]:
+        """Сохранение вопроса в историю, возвращает ID, выданный SQLite"""
+        # INSERT идет мимо журнала - сначала записываем отложенные изменения,
+        # чтобы, например, очистка истории не удалила новый вопрос
+        await self.journal.flush()
+        return await self._insert_question(lobby_id, user_id, question_text)
+
+    @run_in_db_thread
+    def _insert_question(
         self, lobby_id: int, user_id: int, question_text: str
-    ) -> int:
-        """Сохранение вопроса в историю"""
+    ) -> Optional[int]:
         try:
-            self.db.cursor.execute(
-                """
-                INSERT INTO question_history (lobby_id, user_id, question_text)
-                VALUES (?, ?, ?)
-                """,
-                (lobby_id, user_id, question_text),
-            )
-            self.db._connection.commit()
-            question_id = self.db.cursor.lastrowid
+            with self.db.transaction() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO question_history (lobby_id, user_id, question_text)
+                    VALUES (?, ?, ?)
+                    """,
+                    (lobby_id, user_id, question_text),
+                )
+                question_id = cursor.lastrowid
             logger.info(f"Вопрос сохранен: ID={question_id}, user={user_id}")
             return question_id
         except Exception as e:
             logger.error(f"Ошибка сохранения вопроса: {e}")
-            return -1
+            return None
 
     def update_question_votes(
         self, question_id: int, yes_votes: int, no_votes: int
-    ) -> bool:
+    ) -> None:
         """Обновление результатов голосования для вопроса"""
-        try:
-            self.db.cursor.execute(
-                """
-                UPDATE question_history 
-                SET votes_yes = ?, votes_no = ?
-                WHERE id = ?
-                """,
-                (yes_votes, no_votes, question_id),
-            )
-            self.db._connection.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка обновления голосов: {e}")
-            return False
+        self.journal.append(
+            """
+            UPDATE question_history
+            SET votes_yes = ?, votes_no = ?
+            WHERE id = ?
+            """,
+            (yes_votes, no_votes, question_id),
+        )
 
-    def get_player_question_history(
+    async def get_player_question_history(
         self, user_id: int, lobby_id: int, limit: int = 20
     ) -> List[Dict[str, Any]]:
         """Получение истории вопросов игрока"""
+        # Читаем только после записи отложенных изменений
+        await self.journal.flush()
+        return await self._get_player_question_history(user_id, lobby_id, limit)
+
+    @run_in_db_thread
+    def _get_player_question_history(
+        self, user_id: int, lobby_id: int, limit: int
+    ) -> List[Dict[str, Any]]:
         try:
-            self.db.cursor.execute(
-                """
-                SELECT id, question_text, asked_at, votes_yes, votes_no
-                FROM question_history
-                WHERE user_id = ? AND lobby_id = ?
-                ORDER BY asked_at DESC
-                LIMIT ?
-                """,
-                (user_id, lobby_id, limit),
-            )
+            with self.db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT id, question_text, asked_at, votes_yes, votes_no
+                    FROM question_history
+                    WHERE user_id = ? AND lobby_id = ?
+                    ORDER BY asked_at DESC, id DESC
+                    LIMIT ?
+                    """,
+                    (user_id, lobby_id, limit),
+                )
 
-            rows = self.db.cursor.fetchall()
+                rows = cursor.fetchall()
             return [
                 {
                     "id": row[0],
@@ -117,55 +214,123 @@ class GameStorageManager:
             logger.error(f"Ошибка получения истории: {e}")
             return []
 
-    def cleanup_game_history(self, lobby_id: int) -> bool:
+    def cleanup_game_history(self, lobby_id: int) -> None:
         """Очистка истории игры"""
-        try:
-            self.db.cursor.execute(
-                "DELETE FROM question_history WHERE lobby_id = ?", (lobby_id,)
-            )
-            self.db._connection.commit()
-            logger.info(f"История очищена для лобби {lobby_id}")
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка очистки истории: {e}")
-            return False
+        self.journal.append(
+            "DELETE FROM question_history WHERE lobby_id = ?", (lobby_id,)
+        )
+        logger.info(f"История очищена для лобби {lobby_id}")
 
     # ===== Работа с ролями (БД) =====
 
-    def save_player_roles(self, lobby_id: int, roles: Dict[int, str]) -> bool:
+    def save_player_roles(self, lobby_id: int, roles: Dict[int, str]) -> None:
         """Сохранение ролей игроков в БД"""
-        try:
-            for user_id, role in roles.items():
-                self.db.cursor.execute(
-                    """
-                    UPDATE lobby_players
-                    SET player_character = ?
-                    WHERE lobby_id = ? AND user_id = ?
-                    """,
-                    (role, lobby_id, user_id),
-                )
-            self.db._connection.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка сохранения ролей: {e}")
-            return False
-
-    def clear_player_roles(self, lobby_id: int) -> bool:
-        """Очистка ролей игроков"""
-        try:
-            self.db.cursor.execute(
+        for user_id, role in roles.items():
+            self.journal.append(
                 """
                 UPDATE lobby_players
-                SET player_character = ''
-                WHERE lobby_id = ?
+                SET player_character = ?
+                WHERE lobby_id = ? AND user_id = ?
                 """,
+                (role, lobby_id, user_id),
+            )
+
+    def clear_player_roles(self, lobby_id: int) -> None:
+        """Очистка ролей игроков"""
+        self.journal.append(
+            """
+            UPDATE lobby_players
+            SET player_character = ''
+            WHERE lobby_id = ?
+            """,
+            (lobby_id,),
+        )
+
+    # ===== Журнал событий игры (БД) =====
+
+    def _record_event(
+        self, game_state: GameState, kind: str, data: Dict[str, Any]
+    ) -> None:
+        """Запись события игры через отложенный журнал"""
+        self.journal.append(
+            """
+            INSERT INTO game_events (lobby_id, seq, kind, data)
+            VALUES (?, ?, ?, ?)
+            """,
+            (
+                game_state.lobby_id,
+                game_state.seq,
+                kind,
+                json.dumps(data, ensure_ascii=False),
+            ),
+        )
+        if game_state.seq % GAME_CHECKPOINT_EVERY == 0:
+            self._checkpoint(game_state)
+
+    def _checkpoint(self, game_state: GameState) -> None:
+        """Контрольная точка: полное состояние вместо накопленных событий"""
+        self.journal.append(
+            """
+            INSERT OR REPLACE INTO game_checkpoints (lobby_id, seq, state)
+            VALUES (?, ?, ?)
+            """,
+            (
+                game_state.lobby_id,
+                game_state.seq,
+                json.dumps(game_state.to_dict(), ensure_ascii=False),
+            ),
+        )
+        self.journal.append(
+            "DELETE FROM game_events WHERE lobby_id = ? AND seq <= ?",
+            (game_state.lobby_id, game_state.seq),
+        )
+
+    def cleanup_game_log(self, lobby_id: int) -> None:
+        """Удаление журнала событий завершенной игры"""
+        # События, возникшие после очистки, в журнал уже не попадают
+        game_state = self.active_games.get(lobby_id)
+        if game_state is not None:
+            game_state.listener = None
+
+        self.journal.append("DELETE FROM game_events WHERE lobby_id = ?", (lobby_id,))
+        self.journal.append(
+            "DELETE FROM game_checkpoints WHERE lobby_id = ?", (lobby_id,)
+        )
+
+    async def load_game_log(self, lobby_id: int) -> Optional[GameState]:
+        """Восстановление игры лобби по журналу событий (для разбора и отладки)"""
+        await self.journal.flush()
+        checkpoint, events = await self._read_game_log(lobby_id)
+        if checkpoint is None and not events:
+            return None
+        return GameState.replay(lobby_id, events, checkpoint)
+
+    @run_in_db_thread
+    def _read_game_log(
+        self, lobby_id: int
+    ) -> Tuple[Optional[Dict[str, Any]], List[Event]]:
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                "SELECT seq, state FROM game_checkpoints WHERE lobby_id = ?",
                 (lobby_id,),
             )
-            self.db._connection.commit()
-            return True
-        except Exception as e:
-            logger.error(f"Ошибка очистки ролей: {e}")
-            return False
+            row = cursor.fetchone()
+            checkpoint = json.loads(row[1]) if row else None
+
+            cursor.execute(
+                """
+                SELECT kind, data FROM game_events
+                WHERE lobby_id = ? AND seq > ?
+                ORDER BY seq
+                """,
+                (lobby_id, row[0] if row else 0),
+            )
+            events = [(kind, json.loads(data)) for kind, data in cursor.fetchall()]
+        return checkpoint, events
+
+    async def flush(self) -> None:
+        """Запись отложенных изменений в БД"""
+        await self.journal.flush()
 
     # ===== Статистика и метрики =====
 
@@ -1,8 +1,12 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
+import asyncio
 import logging
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 
+from game.outbound_scheduler import OutboundScheduler, PRIORITY_INFO, PRIORITY_TURN
+from game.username_service import UsernameService
+
 logger = logging.getLogger(__name__)
 
 
@@ -10,28 +14,23 @@ class GameNotifier:
     """Сервис отправки уведомлений и сообщений"""
 
     def __init__(self):
-        self._username_cache: Dict[int, str] = {}
+        self.usernames = UsernameService()
+        # Очередь исходящих сообщений с учетом лимитов Telegram
+        self.outbound = OutboundScheduler()
 
     # ===== Утилиты =====
 
     async def get_username(
         self, context: ContextTypes.DEFAULT_TYPE, user_id: int
     ) -> str:
-        """Получение username с кэшированием"""
-        if user_id in self._username_cache:
-            return self._username_cache[user_id]
-
-        if user_id < 0:
-            return f"AI Bot {-user_id}"
+        """Получение username через общий кэш имен"""
+        return await self.usernames.resolve(context.bot, user_id)
 
-        try:
-            chat = await context.bot.get_chat(user_id)
-            username = f"@{chat.username}" if chat.username else f"Игрок {user_id}"
-            self._username_cache[user_id] = username
-            return username
-        except Exception as e:
-            logger.error(f"Ошибка получения username: {e}")
-            return f"Игрок {user_id}"
+    async def get_usernames(
+        self, context: ContextTypes.DEFAULT_TYPE, user_ids: Iterable[int]
+    ) -> Dict[int, str]:
+        """Получение username нескольких игроков за один параллельный заход"""
+        return await self.usernames.resolve_many(context.bot, user_ids)
 
     # ===== Основные уведомления =====
 
@@ -41,20 +40,40 @@ class GameNotifier:
         user_id: int,
         text: str,
         reply_markup: Optional[InlineKeyboardMarkup] = None,
+        priority: int = PRIORITY_INFO,
     ) -> bool:
-        """Отправка сообщения конкретному игроку"""
+        """Отправка сообщения конкретному игроку через очередь отправки"""
 
         if user_id < 0:
             return True
 
-        try:
-            await context.bot.send_message(
-                chat_id=user_id, text=text, reply_markup=reply_markup, parse_mode="HTML"
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Не удалось отправить сообщение игроку {user_id}: {e}")
-            return False
+        return await self.outbound.send(
+            context.bot, user_id, text, reply_markup, priority
+        )
+
+    async def _fan_out(
+        self,
+        context: ContextTypes.DEFAULT_TYPE,
+        user_ids: Iterable[int],
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+    ) -> Dict[int, bool]:
+        """
+        Параллельная отправка одного сообщения нескольким игрокам.
+        Лимиты Telegram и порядок сообщений в чате соблюдает очередь отправки.
+        """
+        recipients = list(dict.fromkeys(user_id for user_id in user_ids if user_id > 0))
+        if not recipients:
+            return {}
+
+        results = await asyncio.gather(
+            *(
+                self.send_to_player(context, user_id, text, reply_markup)
+                for user_id in recipients
+            ),
+            return_exceptions=True,
+        )
+        return {user_id: result is True for user_id, result in zip(recipients, results)}
 
     async def broadcast_to_game(
         self,
@@ -64,56 +83,79 @@ class GameNotifier:
         exclude_users: List[int] = None,
     ) -> Dict[int, bool]:
         """Рассылка сообщения всем игрокам игры"""
-        results = {}
         exclude_users = exclude_users or []
 
-        for user_id in game_state.get_all_players():
-            if user_id in exclude_users or user_id < 0:
-                continue
-
-            success = await self.send_to_player(context, user_id, text)
-            results[user_id] = success
-
-        return results
+        return await self._fan_out(
+            context,
+            (
+                user_id
+                for user_id in game_state.get_all_players()
+                if user_id not in exclude_users
+            ),
+            text,
+        )
 
     # ===== Игровые уведомления =====
-    async def send_game_rules(
-        self,
-        context: ContextTypes.DEFAULT_TYPE,
-        game_state,
-        user_id: int,
-        other_players_roles: Dict[int, str],
-    ) -> bool:
-        """Отправка правил игры"""
-        if user_id < 0:
-            return True
-
-        try:
-            # Формируем список ролей других игроков
-            roles_text = "📋 Роли других игроков:\n"
-            for other_id, role in other_players_roles.items():
-                if other_id != user_id:
-                    username = await self.get_username(context, other_id)
-                    roles_text += f"👤 {username}: {role}\n"
-
-            rules_text = (
-                "🎮 Игра началась!\n\n"
-                f"{roles_text}\n"
-                "❓ Ваша роль скрыта от вас!\n\n"
-                "📝 Правила игры:\n"
-                "1. Ваша цель - угадать, кто вы, задавая вопросы другим игрокам\n"
-                "2. Вы можете задавать вопросы о своем персонаже\n"
-                "3. Другие игроки голосуют, согласны ли они с вопросом\n"
-                "4. Если большинство ответит «Да» - вы можете задать еще вопрос\n"
-                "5. Если большинство ответит «Нет» - ход переходит следующему игроку\n"
-                "6. Для финальной догадки используйте формат: «Я [персонаж]!» (с восклицательным знаком)\n\n"
-                "Удачи!"
-            )
+    async def send_game_start(
+        self, context: ContextTypes.DEFAULT_TYPE, game_state, first_player: int
+    ) -> None:
+        """
+        Начало игры: правила с ролями остальных - каждому игроку,
+        уведомление о ходе - первому, объявление о начале - остальным.
+        Все сообщения уходят параллельно через очередь отправки.
+        """
+        players = game_state.get_all_players()
+        usernames = await self.get_usernames(context, players)
+        roles = {user_id: game_state.get_player_role(user_id) for user_id in players}
+
+        start_text = (
+            "🎮 Игра началась!\n"
+            f"Первый ход у: {usernames[first_player]}\n"
+            "Ожидайте вопросов и будьте готовы голосовать!"
+        )
+        results = await asyncio.gather(
+            *(
+                self.send_to_player(
+                    context, user_id, self._rules_text(user_id, roles, usernames)
+                )
+                for user_id in players
+                if user_id > 0
+            ),
+            self.send_turn_notification(context, game_state, first_player),
+            self._fan_out(
+                context,
+                (user_id for user_id in players if user_id != first_player),
+                start_text,
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Ошибка рассылки о начале игры: {result}")
 
-            return await self.send_to_player(context, user_id, rules_text)
-        except Exception as e:
-            logger.error(f"Ошибка отправки правил: {e}")
-            return False
+    @staticmethod
+    def _rules_text(
+        user_id: int, roles: Dict[int, str], usernames: Dict[int, str]
+    ) -> str:
+        """Правила игры и роли всех игроков, кроме получателя"""
+        roles_text = "📋 Роли других игроков:\n"
+        for other_id, role in roles.items():
+            if other_id != user_id and role:
+                roles_text += f"👤 {usernames[other_id]}: {role}\n"
+
+        return (
+            "🎮 Игра началась!\n\n"
+            f"{roles_text}\n"
+            "❓ Ваша роль скрыта от вас!\n\n"
+            "📝 Правила игры:\n"
+            "1. Ваша цель - угадать, кто вы, задавая вопросы другим игрокам\n"
+            "2. Вы можете задавать вопросы о своем персонаже\n"
+            "3. Другие игроки голосуют, согласны ли они с вопросом\n"
+            "4. Если большинство ответит «Да» - вы можете задать еще вопрос\n"
+            "5. Если большинство ответит «Нет» - ход переходит следующему игроку\n"
+            "6. Для финальной догадки используйте формат: «Я [персонаж]!» (с восклицательным знаком)\n\n"
+            "Удачи!"
+        )
 
     async def send_vote_question(
         self,
@@ -146,19 +188,16 @@ class GameNotifier:
             )
 
             # Отправляем всем, кроме спрашивающего
-            success_count = 0
-            for player_id in game_state.get_all_players():
-                if player_id != asking_player_id and player_id > 0:
-                    success = await self.send_to_player(
-                        context, player_id, message_text, reply_markup
-                    )
-                    if success:
-                        success_count += 1
-
-                if player_id < 0:
-                    success_count += 1
-
-            return success_count > 0
+            players = game_state.get_all_players()
+            results = await self._fan_out(
+                context,
+                (player_id for player_id in players if player_id != asking_player_id),
+                message_text,
+                reply_markup,
+            )
+
+            # Боты голосуют без сообщений
+            return any(results.values()) or any(player_id < 0 for player_id in players)
         except Exception as e:
             logger.error(f"Ошибка отправки вопроса: {e}")
             return False
@@ -211,15 +250,22 @@ class GameNotifier:
         game_result: Dict[str, Any] = None,
     ) -> Dict[int, bool]:
         """Уведомление о выходе игрока"""
-        exiting_username = await self.get_username(context, exiting_user_id)
+        game_result = game_result or {}
+        winner_id = game_result.get("winner_id")
+        next_player = game_result.get("next_player")
+        usernames = await self.get_usernames(
+            context,
+            [exiting_user_id, *game_state.get_all_players()]
+            + [user_id for user_id in (winner_id, next_player) if user_id],
+        )
+        exiting_username = usernames[exiting_user_id]
 
         notification_text = f"⚠️ {exiting_username} вышел из игры!\n\n"
 
-        if game_result and game_result.get("end_game"):
+        if game_result.get("end_game"):
             # Игра завершилась
-            winner_id = game_result.get("winner_id")
             if winner_id:
-                winner_username = await self.get_username(context, winner_id)
+                winner_username = usernames[winner_id]
                 winner_role = game_result.get("winner_role", "Неизвестно")
 
                 notification_text += (
@@ -233,8 +279,7 @@ class GameNotifier:
                 for player_id in game_state.get_all_players():
                     role = game_state.get_player_role(player_id)
                     if role:
-                        username = await self.get_username(context, player_id)
-                        notification_text += f"{username}: {role}\n"
+                        notification_text += f"{usernames[player_id]}: {role}\n"
         else:
             # Игра продолжается
             notification_text += (
@@ -242,9 +287,8 @@ class GameNotifier:
             )
 
             if exit_info.get("was_current_player"):
-                next_player = game_result.get("next_player") if game_result else None
                 if next_player:
-                    next_player_username = await self.get_username(context, next_player)
+                    next_player_username = usernames[next_player]
                     notification_text += f"\n🎮 Следующий ход у: {next_player_username}"
 
         return await self.broadcast_to_game(
@@ -259,15 +303,17 @@ class GameNotifier:
         winner_role: str,
     ) -> Dict[int, bool]:
         """Уведомление о завершении игры"""
-        winner_username = await self.get_username(context, winner_id)
+        usernames = await self.get_usernames(
+            context, [winner_id, *game_state.get_all_players()]
+        )
+        winner_username = usernames[winner_id]
 
         # Раскрываем все роли
         roles_text = "📋 Все роли:\n"
         for player_id in game_state.get_all_players():
             role = game_state.get_player_role(player_id)
             if role:
-                username = await self.get_username(context, player_id)
-                roles_text += f"{username}: {role}\n"
+                roles_text += f"{usernames[player_id]}: {role}\n"
 
         end_message = (
             f"🎉 Поздравляем! {winner_username} угадал(а) своего персонажа!\n\n"
@@ -299,7 +345,9 @@ class GameNotifier:
                 "«Я [предполагаемый персонаж]!» (обязателен восклицательный знак в конце!)"
             )
 
-            return await self.send_to_player(context, player_id, message_text)
+            return await self.send_to_player(
+                context, player_id, message_text, priority=PRIORITY_TURN
+            )
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления о ходе: {e}")
             return False
@@ -308,7 +356,4 @@ class GameNotifier:
 
     def clear_username_cache(self, user_id: int = None):
         """Очистка кэша username"""
-        if user_id:
-            self._username_cache.pop(user_id, None)
-        else:
-            self._username_cache.clear()
+        self.usernames.invalidate(user_id)
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from config import SNAPSHOT_INTERVAL, SNAPSHOT_PATH
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+Collect = Callable[[], List[Dict[str, Any]]]
+
+
+class GameSnapshot:
+    """
+    Снимок активных игр в файле JSON Lines: первая строка - заголовок,
+    дальше по строке на игру. Снимок пишется в фоне раз в interval секунд
+    во временный файл, который затем атомарно заменяет прежний.
+    """
+
+    def __init__(
+        self,
+        collect: Collect,
+        path: str = SNAPSHOT_PATH,
+        interval: float = SNAPSHOT_INTERVAL,
+    ):
+        # collect возвращает записи об играх, вызывается в event loop
+        self._collect = collect
+        self.path = path
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        # Последний записанный снимок: неизменившийся не перезаписываем
+        self._last: Optional[List[str]] = None
+
+        # Метрики
+        self.saves = 0
+        self.skipped = 0
+
+    def start(self) -> None:
+        """Запуск периодической записи"""
+        if self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.save()
+
+    async def save(self) -> bool:
+        """Запись снимка, если состояние изменилось с прошлого раза"""
+        try:
+            # Сериализуем в event loop, пока состояние игр не меняется
+            lines = [
+                json.dumps(record, ensure_ascii=False) for record in self._collect()
+            ]
+        except Exception as e:
+            logger.error(f"Ошибка сериализации снимка игр: {e}")
+            return False
+
+        if lines == self._last:
+            self.skipped += 1
+            return False
+
+        header = json.dumps({"version": SNAPSHOT_VERSION, "saved_at": time.time()})
+        try:
+            await asyncio.to_thread(self._write, [header, *lines])
+        except Exception as e:
+            logger.error(f"Ошибка записи снимка игр: {e}")
+            return False
+
+        self._last = lines
+        self.saves += 1
+        return True
+
+    def _write(self, lines: List[str]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+        # Переименование тоже должно пережить сбой питания
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(directory, os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    async def load(self) -> List[Dict[str, Any]]:
+        """Записи об играх из последнего снимка"""
+        try:
+            return await asyncio.to_thread(self._read)
+        except Exception as e:
+            logger.error(f"Ошибка чтения снимка игр: {e}")
+            return []
+
+    def _read(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        if not lines:
+            return []
+
+        header = json.loads(lines[0])
+        if header.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"Снимок игр другой версии пропущен: {header}")
+            return []
+
+        records = []
+        for number, line in enumerate(lines[1:], 2):
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                logger.error(f"Поврежденная строка {number} снимка игр: {e}")
+        logger.info(
+            f"Снимок игр от {time.ctime(header['saved_at'])}: {len(records)} игр"
+        )
+        return records
+
+    def stats(self) -> Dict[str, int]:
+        """Метрики записи снимков"""
+        return {"saves": self.saves, "skipped": self.skipped}
+
+    async def stop(self) -> None:
+        """Остановка фоновой записи и финальный снимок"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.save()
@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
@@ -6,6 +6,24 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Переходы состояния игры, которые записываются в журнал событий.
+# Название события совпадает с методом GameState, данные - с его аргументами
+EVENTS = (
+    "add_player",
+    "start_game",
+    "start_vote",
+    "add_vote",
+    "withdraw_vote",
+    "end_vote",
+    "next_player",
+    "remove_player",
+    "finish_game",
+)
+
+Event = Tuple[str, Dict[str, Any]]
+Listener = Callable[['GameState', str, Dict[str, Any]], None]
+
+
 class GameStatus(Enum):
     WAITING = "waiting"
     PLAYING = "playing"
@@ -13,7 +31,7 @@ class GameStatus(Enum):
     FINISHED = "finished"
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerData:
     user_id: int
     role: str
@@ -21,48 +39,222 @@ class PlayerData:
     questions_asked: int = 0
     is_bot: bool = False
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Конвертация в словарь (для сериализации)"""
+        return {
+            "role": self.role,
+            "has_voted": self.has_voted,
+            "questions_asked": self.questions_asked,
+            "is_bot": self.is_bot,
+        }
 
-@dataclass
+    @classmethod
+    def from_dict(cls, user_id: int, data: Dict[str, Any]) -> 'PlayerData':
+        """Восстановление из словаря"""
+        return cls(
+            user_id=user_id,
+            role=data["role"],
+            has_voted=data.get("has_voted", False),
+            questions_asked=data.get("questions_asked", 0),
+            is_bot=data.get("is_bot", False),
+        )
+
+
+@dataclass(slots=True)
 class VoteData:
     question: str
     votes: Dict[int, str] = field(default_factory=dict)  # user_id -> vote
     total_players: int = 0
     question_owner_id: int = 0
+    # ID вопроса в question_history
+    question_id: Optional[int] = None
+    # Текущие итоги, обновляются вместе с votes
+    yes_count: int = 0
+    no_count: int = 0
+
+    @property
+    def voted_count(self) -> int:
+        """Сколько игроков уже проголосовало"""
+        return self.yes_count + self.no_count
+
+    def add_vote(self, user_id: int, vote: str) -> None:
+        """Учет голоса (повторный голос игрока заменяет прежний)"""
+        self.remove_vote(user_id)
+        self.votes[user_id] = vote
+        if vote == "yes":
+            self.yes_count += 1
+        else:
+            self.no_count += 1
+
+    def remove_vote(self, user_id: int) -> bool:
+        """Удаление голоса игрока"""
+        vote = self.votes.pop(user_id, None)
+        if vote is None:
+            return False
+
+        if vote == "yes":
+            self.yes_count -= 1
+        else:
+            self.no_count -= 1
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Конвертация в словарь (для сериализации)"""
+        return {
+            "question": self.question,
+            "votes": {str(user_id): vote for user_id, vote in self.votes.items()},
+            "total_players": self.total_players,
+            "question_owner_id": self.question_owner_id,
+            "question_id": self.question_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'VoteData':
+        """Восстановление из словаря (итоги пересчитываются по голосам)"""
+        vote = cls(
+            question=data["question"],
+            total_players=data["total_players"],
+            question_owner_id=data["question_owner_id"],
+            question_id=data.get("question_id"),
+        )
+        for user_id, value in data["votes"].items():
+            vote.add_vote(int(user_id), value)
+        return vote
 
 
 class GameState:
     """Управление состоянием одной игровой сессии"""
 
+    __slots__ = (
+        "lobby_id",
+        "status",
+        "players",
+        "current_vote",
+        "questions_history",
+        "winner_id",
+        "_order",
+        "_positions",
+        "_current",
+        "listener",
+        "_seq",
+    )
+
     def __init__(self, lobby_id: int):
         self.lobby_id = lobby_id
         self.status = GameStatus.WAITING
         self.players: Dict[int, PlayerData] = {}
-        self.current_player_index = 0
         self.current_vote: Optional[VoteData] = None
         self.questions_history: List[Dict[str, Any]] = []
         self.winner_id: Optional[int] = None
 
+        # Очередность ходов: вышедшие игроки остаются в списке как None
+        # до уплотнения, позиции игроков хранятся в словаре
+        self._order: List[Optional[int]] = []
+        self._positions: Dict[int, int] = {}
+        self._current = 0
+
+        # Журнал событий: номер последнего события и получатель новых
+        self.listener: Optional[Listener] = None
+        self._seq = 0
+
+    @property
+    def seq(self) -> int:
+        """Номер последнего примененного события"""
+        return self._seq
+
+    def _emit(self, kind: str, **data: Any) -> None:
+        self._seq += 1
+        if self.listener is not None:
+            self.listener(self, kind, data)
+
+    def apply(self, kind: str, data: Dict[str, Any]) -> None:
+        """Применение события из журнала (повторно в журнал не пишется)"""
+        if kind not in EVENTS:
+            raise ValueError(f"Неизвестное событие игры: {kind}")
+
+        listener, self.listener = self.listener, None
+        try:
+            getattr(self, kind)(**data)
+        finally:
+            self.listener = listener
+
+    @classmethod
+    def replay(
+        cls,
+        lobby_id: int,
+        events: Iterable[Event],
+        checkpoint: Optional[Dict[str, Any]] = None,
+    ) -> 'GameState':
+        """Восстановление игры: контрольная точка и события после нее"""
+        game_state = cls.from_dict(checkpoint) if checkpoint else cls(lobby_id)
+        for kind, data in events:
+            game_state.apply(kind, data)
+        return game_state
+
+    @property
+    def current_player_index(self) -> int:
+        """Номер текущего игрока среди оставшихся"""
+        return sum(1 for user_id in self._order[: self._current] if user_id is not None)
+
+    @current_player_index.setter
+    def current_player_index(self, index: int) -> None:
+        player_ids = self.get_all_players()
+        if player_ids:
+            self._current = self._positions[player_ids[index % len(player_ids)]]
+
     def add_player(self, user_id: int, role: str) -> None:
         """Добавление игрока в игру"""
         self.players[user_id] = PlayerData(user_id=user_id, role=role)
+        if user_id not in self._positions:
+            self._positions[user_id] = len(self._order)
+            self._order.append(user_id)
+        self._emit("add_player", user_id=user_id, role=role)
+
+    def start_game(self) -> None:
+        """Начало игры"""
+        self.status = GameStatus.PLAYING
+        self._emit("start_game")
 
     def remove_player(self, user_id: int, next_player: int) -> bool:
         """Удаление игрока из игры"""
         if user_id in self.players:
             del self.players[user_id]
 
-            # Если удалили текущего игрока, нужно пересчитать индекс
-            player_ids = list(self.players.keys())
-            self.current_player_index = player_ids.index(next_player)
+            position = self._positions.pop(user_id)
+            self._order[position] = None
+
+            # Если удалили текущего игрока, ход переходит к next_player
+            if next_player in self._positions:
+                self._current = self._positions[next_player]
+            elif position == self._current and self.players:
+                self._current = self._next_position(position)
+
+            if len(self._order) > 2 * len(self.players):
+                self._compact()
+            self._emit("remove_player", user_id=user_id, next_player=next_player)
             return True
         return False
 
+    def _next_position(self, position: int) -> int:
+        """Позиция следующего оставшегося игрока после position"""
+        size = len(self._order)
+        position = (position + 1) % size
+        while self._order[position] is None:
+            position = (position + 1) % size
+        return position
+
+    def _compact(self) -> None:
+        """Удаление пропусков из очередности ходов"""
+        current = self._order[self._current] if self.players else None
+        self._order = [user_id for user_id in self._order if user_id is not None]
+        self._positions = {user_id: i for i, user_id in enumerate(self._order)}
+        self._current = self._positions.get(current, 0)
+
     def get_current_player(self) -> Optional[int]:
         """Получение ID текущего игрока"""
-        player_ids = list(self.players.keys())
-        if not player_ids:
+        if not self.players:
             return None
-        return player_ids[self.current_player_index]
+        return self._order[self._current]
 
     def get_player_role(self, user_id: int) -> Optional[str]:
         """Получение роли игрока"""
@@ -72,20 +264,35 @@ class GameState:
 
     def next_player(self) -> Optional[int]:
         """Переход к следующему игроку"""
-        player_ids = list(self.players.keys())
-        if not player_ids:
+        if not self.players:
             return None
 
-        self.current_player_index = (self.current_player_index + 1) % len(player_ids)
+        self._current = self._next_position(self._current)
+        self._emit("next_player")
         return self.get_current_player()
 
-    def start_vote(self, question: str, question_owner_id: int) -> None:
+    def peek_next_player(self) -> Optional[int]:
+        """ID игрока, к которому перейдет ход (без перехода)"""
+        if not self.players:
+            return None
+        return self._order[self._next_position(self._current)]
+
+    def start_vote(
+        self, question: str, question_owner_id: int, question_id: Optional[int] = None
+    ) -> None:
         """Начало голосования"""
         self.status = GameStatus.VOTING
         self.current_vote = VoteData(
             question=question,
             total_players=len(self.players) - 1,  # минус спрашивающий
             question_owner_id=question_owner_id,
+            question_id=question_id,
+        )
+        self._emit(
+            "start_vote",
+            question=question,
+            question_owner_id=question_owner_id,
+            question_id=question_id,
         )
 
     def add_vote(self, user_id: int, vote: str) -> bool:
@@ -93,23 +300,31 @@ class GameState:
         if not self.current_vote or user_id == self.current_vote.question_owner_id:
             return False
 
-        self.current_vote.votes[user_id] = vote
+        self.current_vote.add_vote(user_id, vote)
+        self._emit("add_vote", user_id=user_id, vote=vote)
+        return True
+
+    def withdraw_vote(self, user_id: int) -> bool:
+        """Отзыв голоса вышедшего игрока: голосующих становится меньше"""
+        if not self.current_vote or not self.current_vote.remove_vote(user_id):
+            return False
+
+        self.current_vote.total_players -= 1
+        self._emit("withdraw_vote", user_id=user_id)
         return True
 
     def is_voting_complete(self) -> bool:
         """Проверка завершения голосования"""
         if not self.current_vote:
             return False
-        return len(self.current_vote.votes) >= self.current_vote.total_players
+        return self.current_vote.voted_count >= self.current_vote.total_players
 
     def get_vote_results(self) -> Dict[str, int]:
         """Получение результатов голосования"""
         if not self.current_vote:
             return {"yes": 0, "no": 0}
 
-        yes_votes = sum(1 for v in self.current_vote.votes.values() if v == "yes")
-        no_votes = len(self.current_vote.votes) - yes_votes
-        return {"yes": yes_votes, "no": no_votes}
+        return {"yes": self.current_vote.yes_count, "no": self.current_vote.no_count}
 
     def end_vote(self) -> None:
         """Завершение голосования"""
@@ -120,11 +335,13 @@ class GameState:
         current_player = self.get_current_player()
         if current_player and current_player in self.players:
             self.players[current_player].questions_asked += 1
+        self._emit("end_vote")
 
     def finish_game(self, winner_id: int) -> None:
         """Завершение игры"""
         self.status = GameStatus.FINISHED
         self.winner_id = winner_id
+        self._emit("finish_game", winner_id=winner_id)
 
     def get_remaining_players_count(self) -> int:
         """Количество оставшихся игроков"""
@@ -148,13 +365,42 @@ class GameState:
             "lobby_id": self.lobby_id,
             "status": self.status.value,
             "players": {
-                str(user_id): {
-                    "role": data.role,
-                    "questions_asked": data.questions_asked,
-                }
-                for user_id, data in self.players.items()
+                str(user_id): data.to_dict() for user_id, data in self.players.items()
             },
+            # Очередность ходов без пропусков и чей сейчас ход
+            "order": [user_id for user_id in self._order if user_id is not None],
+            "current_player": self.get_current_player(),
             "current_player_index": self.current_player_index,
             "current_vote": self.current_vote.to_dict() if self.current_vote else None,
+            "questions_history": self.questions_history,
             "winner_id": self.winner_id,
+            "seq": self._seq,
         }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GameState':
+        """Восстановление состояния игры из словаря"""
+        game_state = cls(data["lobby_id"])
+        game_state.status = GameStatus(data["status"])
+
+        players = {int(user_id): value for user_id, value in data["players"].items()}
+        for user_id in data.get("order") or players:
+            user_id = int(user_id)
+            game_state.players[user_id] = PlayerData.from_dict(
+                user_id, players[user_id]
+            )
+            game_state._positions[user_id] = len(game_state._order)
+            game_state._order.append(user_id)
+
+        current = data.get("current_player")
+        if current in game_state._positions:
+            game_state._current = game_state._positions[current]
+        else:
+            game_state.current_player_index = data.get("current_player_index", 0)
+
+        if data.get("current_vote"):
+            game_state.current_vote = VoteData.from_dict(data["current_vote"])
+        game_state.questions_history = data.get("questions_history", [])
+        game_state.winner_id = data.get("winner_id")
+        game_state._seq = data.get("seq", 0)
+        return game_state
@@ -0,0 +1,93 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+from config import LLM_MAX_CONNECTIONS, LLM_MAX_RETRIES, LLM_TIMEOUT
+from utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+YANDEX_CLOUD_FOLDER = os.getenv("YANDEX_CLOUD_FOLDER")
+YANDEX_CLOUD_API_KEY = os.getenv("YANDEX_CLOUD_API_KEY")
+YANDEX_CLOUD_BASE_URL = "https://llm.api.cloud.yandex.net/v1"
+
+
+class LLMClient:
+    """Общий асинхронный клиент LLM с пулом HTTP-соединений"""
+
+    _instance: Optional['LLMClient'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Защита от повторной инициализации
+        if hasattr(self, "_initialized"):
+            return
+
+        self._client = AsyncOpenAI(
+            api_key=YANDEX_CLOUD_API_KEY,
+            base_url=YANDEX_CLOUD_BASE_URL,
+            project=YANDEX_CLOUD_FOLDER,
+            timeout=LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                )
+            ),
+        )
+        # Одинаковые запросы, отправленные одновременно, уходят в API один раз
+        self._single_flight = SingleFlight()
+
+        self._initialized = True
+
+    @staticmethod
+    def model_uri(model: str) -> str:
+        """Полный идентификатор модели в Yandex Cloud"""
+        return f"gpt://{YANDEX_CLOUD_FOLDER}/{model}/latest"
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **params: Any,
+    ) -> str:
+        """
+        Запрос к модели без блокировки event loop.
+        Одинаковые одновременные запросы объединяются в один,
+        отмена всех ожидающих прерывает и HTTP-запрос.
+        """
+        key = json.dumps(
+            [model, messages, params], ensure_ascii=False, sort_keys=True, default=str
+        )
+
+        async def request() -> str:
+            response = await self._client.chat.completions.create(
+                model=self.model_uri(model),
+                messages=messages,
+                timeout=timeout or LLM_TIMEOUT,
+                **params,
+            )
+            return response.choices[0].message.content.strip()
+
+        return await self._single_flight.do(key, request)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики объединения запросов"""
+        return self._single_flight.stats()
+
+    async def close(self) -> None:
+        """Закрытие пула соединений"""
+        await self._client.close()
+        logger.info("LLM клиент закрыт")
@@ -0,0 +1,331 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Deque, Dict, Optional, Set, Tuple
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from config import (
+    NOTIFY_CONCURRENCY,
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_MAX_RETRIES,
+)
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты исходящих сообщений (меньше - важнее)
+PRIORITY_TURN = 0
+PRIORITY_INFO = 1
+
+# Сколько хранить состояние лимита для чата, в который давно не писали
+CHAT_BUCKET_TTL = 600
+CHAT_BUCKET_MAX = 10000
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше capacity про запас"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """
+        Забирает токен и возвращает 0, если он есть.
+        Иначе возвращает, сколько секунд ждать до появления токена.
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Запрет на отправку в течение seconds (например, после RetryAfter)"""
+        self._refill()
+        self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+@dataclass
+class _Message:
+    bot: Bot
+    chat_id: int
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup]
+    priority: int
+    future: 'asyncio.Future[bool]'
+    attempts: int = 0
+
+
+@dataclass
+class _ChatQueue:
+    # Сообщения чата ждут здесь, в общую очередь попадает только первое
+    pending: Deque[_Message] = field(default_factory=deque)
+    busy: bool = False
+
+
+def _retry_after_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    if isinstance(retry_after, timedelta):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class OutboundScheduler:
+    """
+    Планировщик исходящих сообщений Telegram.
+    Соблюдает общий лимит бота и лимит на чат (token bucket),
+    уведомления о ходе отправляет раньше информационных рассылок,
+    сообщения одного чата уходят строго по порядку.
+    При RetryAfter чат ставится на паузу, сетевые ошибки повторяются с backoff.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        chat_rate: float = OUTBOUND_CHAT_RATE,
+        chat_burst: float = OUTBOUND_CHAT_BURST,
+        max_in_flight: int = NOTIFY_CONCURRENCY,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chat_buckets = TTLCache(CHAT_BUCKET_MAX, CHAT_BUCKET_TTL)
+        self._chats: Dict[int, _ChatQueue] = {}
+        self._queue: 'asyncio.PriorityQueue[tuple]' = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._deliveries: Set[asyncio.Task] = set()
+        # Сообщения, отложенные до появления токена или до повтора
+        self._timers: Dict[int, Tuple[asyncio.TimerHandle, _Message]] = {}
+        # Сообщение, которое диспетчер достал из очереди и еще не отправил
+        self._current: Optional[_Message] = None
+        self._sending = 0
+
+        # Метрики
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rate_limited = 0
+
+    # ===== Постановка в очередь =====
+
+    async def send(
+        self,
+        bot: Bot,
+        chat_id: int,
+        text: str,
+        reply_markup: Optional[InlineKeyboardMarkup] = None,
+        priority: int = PRIORITY_INFO,
+    ) -> bool:
+        """Ставит сообщение в очередь и ждет результата отправки"""
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+        message = _Message(
+            bot=bot,
+            chat_id=chat_id,
+            text=text,
+            reply_markup=reply_markup,
+            priority=priority,
+            future=asyncio.get_running_loop().create_future(),
+        )
+
+        chat = self._chats.setdefault(chat_id, _ChatQueue())
+        chat.pending.append(message)
+        if not chat.busy:
+            self._activate(chat_id)
+
+        return await asyncio.shield(message.future)
+
+    def _activate(self, chat_id: int) -> None:
+        """Переносит первое сообщение чата в общую очередь"""
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            return
+        if not chat.pending:
+            del self._chats[chat_id]
+            return
+
+        chat.busy = True
+        self._enqueue(chat.pending.popleft())
+
+    def _enqueue(self, message: _Message) -> None:
+        self._queue.put_nowait((message.priority, next(self._seq), message))
+
+    def _enqueue_later(self, delay: float, message: _Message) -> None:
+        key = next(self._seq)
+        timer = asyncio.get_running_loop().call_later(delay, self._wake, key)
+        self._timers[key] = (timer, message)
+
+    def _wake(self, key: int) -> None:
+        _, message = self._timers.pop(key)
+        self._enqueue(message)
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+        self._chat_buckets.set(chat_id, bucket)
+        return bucket
+
+    # ===== Отправка =====
+
+    async def _dispatch(self) -> None:
+        """Выбирает сообщения по приоритету с учетом лимитов"""
+        while True:
+            _, _, message = await self._queue.get()
+
+            # Лимит чата исчерпан - вернем сообщение в очередь, когда появится токен
+            delay = self._chat_bucket(message.chat_id).try_acquire()
+            if delay > 0:
+                self._enqueue_later(delay, message)
+                continue
+
+            self._current = message
+            delay = self._global.try_acquire()
+            while delay > 0:
+                await asyncio.sleep(delay)
+                delay = self._global.try_acquire()
+
+            await self._in_flight.acquire()
+            self._current = None
+            self._sending += 1
+            task = asyncio.create_task(self._deliver(message))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, message: _Message) -> None:
+        retry_delay = None
+        try:
+            await message.bot.send_message(
+                chat_id=message.chat_id,
+                text=message.text,
+                reply_markup=message.reply_markup,
+                parse_mode="HTML",
+            )
+            self.sent += 1
+            self._finish(message, True)
+        except RetryAfter as e:
+            self.rate_limited += 1
+            retry_delay = _retry_after_seconds(e)
+            # RetryAfter может означать и общий лимит бота - притормаживаем все чаты
+            self._chat_bucket(message.chat_id).pause(retry_delay)
+            self._global.pause(retry_delay)
+            logger.warning(
+                f"Лимит Telegram для чата {message.chat_id}, пауза {retry_delay} сек"
+            )
+        except (Forbidden, BadRequest) as e:
+            # Повтор не поможет: бот заблокирован или сообщение некорректно
+            logger.error(
+                f"Не удалось отправить сообщение игроку {message.chat_id}: {e}"
+            )
+            self._fail(message)
+        except NetworkError as e:
+            retry_delay = min(BACKOFF_MAX, BACKOFF_BASE * 2**message.attempts)
+            logger.warning(f"Сетевая ошибка при отправке игроку {message.chat_id}: {e}")
+        except Exception as e:
+            logger.error(
+                f"Не удалось отправить сообщение игроку {message.chat_id}: {e}"
+            )
+            self._fail(message)
+        finally:
+            self._sending -= 1
+            self._in_flight.release()
+
+        if retry_delay is not None:
+            message.attempts += 1
+            if message.attempts > self.max_retries:
+                logger.error(
+                    f"Сообщение игроку {message.chat_id} не отправлено "
+                    f"после {message.attempts} попыток"
+                )
+                self._fail(message)
+            else:
+                # Сообщение остается первым в своем чате, порядок не нарушается
+                self.retried += 1
+                self._enqueue_later(retry_delay, message)
+
+    def _fail(self, message: _Message) -> None:
+        self.failed += 1
+        self._finish(message, False)
+
+    def _finish(self, message: _Message, result: bool) -> None:
+        if not message.future.done():
+            message.future.set_result(result)
+        self._activate(message.chat_id)
+
+    # ===== Метрики и остановка =====
+
+    def queue_depth(self) -> int:
+        """Сколько сообщений ждут отправки (без уже отправляемых)"""
+        waiting = sum(len(chat.pending) + chat.busy for chat in self._chats.values())
+        return waiting - self._sending
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики очереди отправки"""
+        return {
+            "queue_depth": self.queue_depth(),
+            "in_flight": self._sending,
+            "chats": len(self._chats),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rate_limited": self.rate_limited,
+        }
+
+    async def stop(self) -> None:
+        """Остановка диспетчера, неотправленные сообщения считаются неудачными"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+        # Отложенные и уже взятые диспетчером сообщения нет ни в одной очереди
+        unsent = [message for _, message in self._timers.values()]
+        for timer, _ in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        if self._current is not None:
+            unsent.append(self._current)
+            self._current = None
+
+        while not self._queue.empty():
+            _, _, message = self._queue.get_nowait()
+            unsent.append(message)
+        for chat in self._chats.values():
+            unsent.extend(chat.pending)
+        self._chats.clear()
+
+        for message in unsent:
+            if not message.future.done():
+                message.future.set_result(False)
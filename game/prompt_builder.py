@@ -0,0 +1,171 @@
+import re
+from typing import List, Tuple
+
+from config import PROMPT_HISTORY_VERBATIM, PROMPT_MAX_FACTS
+
+# ===== Неизменяемые части промпта бота =====
+
+SYSTEM_PROMPT = "Ты - стратегический игрок в игре 'Угадай персонажа'. Твоя главная задача - тщательно анализировать историю предыдущих вопросов и ответов. Каждое твое решение должно основываться на анализе всей накопленной информации. Используй стратегию бинарного поиска, группировки и логических выводов из истории."
+
+STRATEGY_PROMPT = """Ты играешь в игру "Угадай персонажа". Тебе загадали конкретного персонажа, но ты не знаешь его имени.
+Твоя задача - угадать своего персонажа, задавая вопросы, на которые можно ответить только "да" или "нет".
+Каждый вопрос может начинаться с фразы "Мой персонаж" и касаться характеристик персонажа.
+Длина каждого вопроса НЕ МОЖЕТ ПРЕВЫШАТЬ 15 СЛОВ.
+
+**СТРАТЕГИЧЕСКАЯ ЛОГИКА АНАЛИЗА ИСТОРИИ:**
+Перед тем как задать следующий вопрос, проанализируй историю по следующим принципам:
+
+1. **ПРИНЦИП РАСШИРЕНИЯ УСПЕХА (РАЗВИТИЕ "ДА"):**
+   - Если получил ответ "да" на общую категорию - задавай более конкретные вопросы в этой же категории
+   - Пример: "Мой персонаж появляется в фильмах?" → "да" → "Мой персонаж главный герой фильма?" → "да" → "Мой персонаж из голливудских фильмов?"
+
+2. **ПРИНЦИП ИСКЛЮЧЕНИЯ ТУПИКОВ (ИЗБЕГАНИЕ "НЕТ"):**
+   - Если получил ответ "нет" на категорию - полностью исключи эту тему из дальнейших вопросов
+   - Пример: "Мой персонаж историческое лицо?" → "нет" → НЕ задавай вопросов про исторические эпохи, годы жизни и т.д.
+   - Пример: "Мой персонаж из видеоигр?" → "нет" → НЕ задавай вопросов про игровые жанры, платформы, студии разработчиков
+
+3. **ПРИНЦИП ЭФФЕКТИВНОЙ ГРУППИРОВКИ:**
+   - Группируй похожие варианты в один вопрос ТОЛЬКО когда они принадлежат к одной общей категории
+   - Пример правильной группировки: "Мой персонаж спортсмен из футбола, баскетбола или тенниса?"
+   - Пример НЕПРАВИЛЬНОЙ группировки: "Мой персонаж футболист или ученый?" (слишком разные категории)
+
+4. **ПРИНЦИП ДИАГНОСТИЧЕСКИХ ВОПРОСОВ:**
+   - Каждый новый вопрос должен максимально уменьшать количество возможных персонажей
+   - Задавай вопросы, которые проверяют КРИТИЧЕСКИЕ характеристики (те, что делят множество персонажей примерно пополам)
+
+**КРИТИЧЕСКИЙ АНАЛИЗ ИСТОРИИ:**
+Проанализируй историю и ответь себе на вопросы:
+1. Какие категории получили "да"? КАК МОЖНО РАСШИРИТЬ эти темы?
+2. Какие категории получили "нет"? КАК ПОЛНОСТЬЮ ИЗБЕЖАТЬ этих тем?
+3. Есть ли в истории закономерности? Например: несколько "да" в области кино → вероятно, это киноперсонаж
+4. Какие ВАЖНЫЕ характеристики еще не проверены? (пол, профессия, эпоха, страна происхождения, медиасреда)
+
+**СТРАТЕГИЧЕСКИЕ ПРАВИЛА:**
+- НИКОГДА не возвращайся к теме, на которую уже получил "нет"
+- АКТИВНО развивай тему, на которую получил "да"
+- Если в истории много "да" в одной области - углубляйся в эту область
+- Если в истории много "нет" - ищи НОВЫЕ, еще не проверенные категории
+- Избегай вопросов, ответы на которые можно ЛОГИЧЕСКИ вывести из истории
+
+**ФОРМАТ ВОПРОСОВ:**
+- Вопрос: начинается с "Мой персонаж..." и заканчивается "?"
+- Угадывание: начинается с "Я ...!" и заканчивается "!"
+"""
+
+HISTORY_HEADER = "\n\n**ИСТОРИЯ ПРЕДЫДУЩИХ ВОПРОСОВ И ОТВЕТОВ:**\n"
+
+HISTORY_ANALYSIS = (
+    "\n**АНАЛИЗ ИСТОРИИ И СТРАТЕГИЧЕСКИЕ ВЫВОДЫ:**\n"
+    "Проанализируй всю историю выше и сделай выводы:\n"
+    "1. Какие характеристики персонажа уже точно известны?\n"
+    "2. Какие категории персонажей уже исключены?\n"
+    "3. Какую информацию можно извлечь из ответов 'да' и 'нет'?\n"
+    "4. Какие темы/категории требуют дополнительного уточнения?\n"
+    "5. Исходя из истории, какие персонажи могут быть вероятными кандидатами?\n\n"
+    "**ПРАВИЛО АНАЛИЗА:**"
+    "Не задавай вопросы, на которые ответ уже содержится в истории (явно или косвенно). "
+)
+
+DECISION_PROMPT = """\n**ПРИНЯТЬ РЕШЕНИЕ НА ОСНОВЕ АНАЛИЗА ИСТОРИИ:**
+    1. Если анализ истории дает тебе достаточно информации для точного предположения - попробуй угадать персонажа (используя формат "Я [имя]!")
+    2. Если информации из истории недостаточно для точного угадывания - задай следующий стратегический вопрос (начиная с "Мой персонаж")
+
+    **РЕШЕНИЕ О ВОПРОСЕ ИЛИ УГАДЫВАНИИ:**
+- Угадывай ТОЛЬКО если можешь назвать КОНКРЕТНОГО персонажа, который очень соответствует многим "да" и малому числу "нет" из истории
+- Если есть хоть одно несоответствие - задавай уточняющий вопрос
+- Ответы на запросы могут иногда врать, но такие случаи редки
+
+    Верни ответ ТОЛЬКО в формате JSON без каких-либо дополнительных пояснений:
+    {"question": "твой_вопрос_или_предположение_здесь", "is_guess": 0 или 1}"""
+
+SUMMARY_HEADER = "\n\n**СВОДКА РАННИХ ВОПРОСОВ (ответы уже получены):**\n"
+KNOWN_FACTS = "Известно о персонаже (ответ «да»): "
+EXCLUDED_FACTS = "Исключено (ответ «нет»), к этим темам не возвращайся: "
+
+_QUESTION_PREFIX_RE = re.compile(r"^\s*(мой персонаж|я)\s+", re.IGNORECASE)
+MAX_FACT_LENGTH = 120
+
+
+def compact_fact(question: str) -> str:
+    """Короткая форма вопроса для сводки: без «Мой персонаж» и знака вопроса"""
+    fact = _QUESTION_PREFIX_RE.sub("", question.strip()).rstrip(" ?!.")
+    return fact[:MAX_FACT_LENGTH]
+
+
+class BotPromptBuilder:
+    """
+    Сборка промпта бота: статичные блоки - константы, строки истории
+    форматируются один раз, а ранние вопросы после порога сжимаются
+    в сводку известных и исключенных фактов.
+    """
+
+    def __init__(
+        self,
+        max_verbatim: int = PROMPT_HISTORY_VERBATIM,
+        max_facts: int = PROMPT_MAX_FACTS,
+    ):
+        self.max_verbatim = max_verbatim
+        self.max_facts = max_facts
+        # Уже отформатированная история: записи и соответствующие строки
+        self._history: List[Tuple[str, str]] = []
+        self._lines: List[str] = []
+        self._facts: List[str] = []
+
+    def _sync(self, history: List[Tuple[str, str]]) -> None:
+        """Дописывает в кэш только новые записи истории"""
+        common = min(len(self._history), len(history))
+        if common and self._history[common - 1] != history[common - 1]:
+            # История разошлась (например, другой исход голосования)
+            common = 0
+            while (
+                common < len(self._history) and self._history[common] == history[common]
+            ):
+                common += 1
+
+        del self._history[common:]
+        del self._lines[common:]
+        del self._facts[common:]
+
+        for i, (question, answer) in enumerate(history[common:], common + 1):
+            self._history.append((question, answer))
+            self._lines.append(
+                f"{i}. Вопрос: {question}\n"
+                f"   Ответ, который ты получал ранее на этот вопрос: {answer}\n"
+            )
+            self._facts.append(compact_fact(question))
+
+    def _summary(self, count: int) -> str:
+        """Сводка первых count записей истории"""
+        known = [
+            fact
+            for fact, (_, answer) in zip(self._facts[:count], self._history)
+            if answer == "Да"
+        ][-self.max_facts :]
+        excluded = [
+            fact
+            for fact, (_, answer) in zip(self._facts[:count], self._history)
+            if answer != "Да"
+        ][-self.max_facts :]
+
+        summary = SUMMARY_HEADER
+        if known:
+            summary += KNOWN_FACTS + "; ".join(known) + "\n"
+        if excluded:
+            summary += EXCLUDED_FACTS + "; ".join(excluded) + "\n"
+        return summary
+
+    def build(self, history: List[Tuple[str, str]]) -> str:
+        """Промпт для очередного вопроса с учетом истории"""
+        self._sync(history)
+        if not history:
+            return STRATEGY_PROMPT + DECISION_PROMPT
+
+        compacted = max(0, len(history) - self.max_verbatim)
+        parts = [STRATEGY_PROMPT]
+        if compacted:
+            parts.append(self._summary(compacted))
+        parts.append(HISTORY_HEADER)
+        parts.extend(self._lines[compacted:])
+        parts.append(HISTORY_ANALYSIS)
+        parts.append(DECISION_PROMPT)
+        return "".join(parts)
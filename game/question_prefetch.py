@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from game.bot_player import BotPlayer, ResponseQuestion
+
+logger = logging.getLogger(__name__)
+
+History = Tuple[Tuple[str, str], ...]
+
+
+class QuestionPrefetcher:
+    """
+    Спекулятивное вычисление следующего вопроса бота, пока идет голосование.
+    Вопрос считается заранее для предполагаемой истории бота и используется,
+    только если к началу хода история совпала.
+    """
+
+    def __init__(self):
+        # (лобби, бот) -> предполагаемая история -> задача с вопросом
+        self._tasks: Dict[Tuple[int, int], Dict[History, asyncio.Task]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(
+        self, lobby_id: int, bot: BotPlayer, history: List[Tuple[str, str]]
+    ) -> None:
+        """Запуск вычисления вопроса для предполагаемой истории"""
+        variants = self._tasks.setdefault((lobby_id, bot.id), {})
+        key = tuple(history)
+        if key not in variants:
+            variants[key] = asyncio.create_task(bot.ask(list(history)))
+
+    async def ask(self, lobby_id: int, bot: BotPlayer) -> ResponseQuestion:
+        """Вопрос бота: заранее вычисленный, если он еще актуален, иначе новый"""
+        variants = self._tasks.pop((lobby_id, bot.id), {})
+        task = variants.pop(tuple(bot.history), None)
+
+        # Варианты для других исходов голосования больше не нужны
+        for other in variants.values():
+            other.cancel()
+
+        if task is not None and not task.cancelled():
+            self.hits += 1
+            return await task
+
+        self.misses += 1
+        return await bot.ask()
+
+    def discard(self, lobby_id: int) -> None:
+        """Отмена всех вычислений для лобби"""
+        for key in [key for key in self._tasks if key[0] == lobby_id]:
+            for task in self._tasks.pop(key).values():
+                task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        """Сколько ходов ботов обслужено заранее вычисленным вопросом"""
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import random
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROLES_PATH = 'data/roles.json'
+
+# Используется, если файла с ролями нет
+DEFAULT_ROLES = (
+    "Гарри Поттер",
+    "Шерлок Холмс",
+    "Супермен",
+    "Человек-паук",
+    "Дарт Вейдер",
+    "Эльза",
+    "Марио",
+    "Сонька Золотая Ручка",
+    "Бэтмен",
+    "Черепашка-ниндзя",
+    "Джеймс Бонд",
+    "Индиана Джонс",
+    "Джокер",
+    "Халк",
+    "Терминатор",
+    "Нео",
+    "Фродо Бэггинс",
+    "Ариадна",
+)
+
+
+class RoleCatalog:
+    """
+    Резервный каталог ролей из data/roles.json.
+    Загружается один раз и перечитывается только при изменении файла.
+    """
+
+    def __init__(self, path: str = ROLES_PATH):
+        self.path = path
+        self._mtime: float = -1.0
+        self._roles: Tuple[str, ...] = ()
+        self._lowercase: Tuple[str, ...] = ()
+        self._index: Dict[str, int] = {}  # роль в нижнем регистре -> позиция
+        self._reload_if_changed()
+
+    # ===== Загрузка =====
+
+    def _reload_if_changed(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError as e:
+            if not self._roles:
+                logger.error(f"Файл roles.json недоступен: {e}")
+                self._set_roles(DEFAULT_ROLES)
+            return
+
+        if mtime == self._mtime:
+            return
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                roles = self._validate(json.load(f))
+            self._set_roles(roles)
+            logger.info(f"Каталог ролей загружен: {len(self._roles)} ролей")
+        except (OSError, ValueError, TypeError) as e:
+            logger.error(f"Ошибка чтения roles.json, оставляем прежний каталог: {e}")
+            if not self._roles:
+                self._set_roles(DEFAULT_ROLES)
+        self._mtime = mtime
+
+    @staticmethod
+    def _validate(roles: Any) -> List[str]:
+        """Каталог должен быть непустым списком строк"""
+        if not isinstance(roles, list):
+            raise TypeError(f"ожидался список, получен {type(roles).__name__}")
+        if not all(isinstance(role, str) for role in roles):
+            raise TypeError("все роли должны быть строками")
+        if not any(role.strip() for role in roles):
+            raise ValueError("список ролей пуст")
+        return roles
+
+    def _set_roles(self, roles: Iterable[str]) -> None:
+        unique: Dict[str, str] = {}
+        for role in roles:
+            if isinstance(role, str) and role.strip():
+                unique.setdefault(role.strip().casefold(), role.strip())
+
+        self._roles = tuple(unique.values())
+        self._lowercase = tuple(unique.keys())
+        self._index = {lower: i for i, lower in enumerate(self._lowercase)}
+
+    # ===== Доступ =====
+
+    @property
+    def roles(self) -> Tuple[str, ...]:
+        """Неизменяемый кортеж ролей"""
+        self._reload_if_changed()
+        return self._roles
+
+    def __len__(self) -> int:
+        return len(self.roles)
+
+    def __contains__(self, role: str) -> bool:
+        self._reload_if_changed()
+        return role.strip().casefold() in self._index
+
+    def sample(self, count: int, exclude: Iterable[str] = ()) -> List[str]:
+        """
+        Случайные роли без повторов, кроме исключенных.
+        Выбираются индексы, сам каталог не копируется.
+        """
+        roles = self.roles
+        excluded = {
+            self._index[role.casefold()]
+            for role in exclude
+            if role.casefold() in self._index
+        }
+        count = min(count, len(roles) - len(excluded))
+        if count <= 0:
+            return []
+
+        indices = random.sample(range(len(roles)), count + len(excluded))
+        return [roles[i] for i in indices if i not in excluded][:count]
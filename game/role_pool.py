@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import re
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from config import (
+    ROLE_POOL_BATCH_SIZE,
+    ROLE_POOL_MAX_THEMES,
+    ROLE_POOL_WAIT_TIMEOUT,
+    ROLE_POOL_WATERMARK,
+)
+from game.theme_cache import canonicalize_theme
+
+logger = logging.getLogger(__name__)
+
+_SPACES_RE = re.compile(r"\s+")
+_CYRILLIC_RE = re.compile(r"[а-яё]", re.IGNORECASE)
+_LATIN_RE = re.compile(r"[a-z]", re.IGNORECASE)
+MAX_ROLE_LENGTH = 60
+
+RoleGenerator = Callable[[int, Optional[str]], Awaitable[List[str]]]
+
+
+class _RoleBuffer:
+    """Очередь персонажей одной темы без повторов"""
+
+    __slots__ = ("roles", "known")
+
+    def __init__(self):
+        self.roles: Deque[str] = deque()
+        self.known: Set[str] = set()
+
+
+class RolePool:
+    """Фоновый пул заранее сгенерированных персонажей по темам"""
+
+    def __init__(
+        self,
+        generator: RoleGenerator,
+        watermark: int = ROLE_POOL_WATERMARK,
+        batch_size: int = ROLE_POOL_BATCH_SIZE,
+        max_themes: int = ROLE_POOL_MAX_THEMES,
+    ):
+        self._generator = generator
+        self.watermark = watermark
+        self.batch_size = batch_size
+        # Хотя бы одна тема: иначе только что добавленный буфер сразу вытесняется
+        self.max_themes = max(1, max_themes)
+        # ключ темы -> буфер; None - персонажи без темы
+        self._buffers: 'OrderedDict[Optional[str], _RoleBuffer]' = OrderedDict()
+        self._refills: Dict[Optional[str], asyncio.Task] = {}
+        # Взводится при пополнении буфера и завершении дозаполнения
+        self._changed = asyncio.Event()
+
+    @staticmethod
+    def theme_key(theme: Optional[str]) -> Optional[str]:
+        """Ключ буфера для темы (похожие формулировки темы делят один буфер)"""
+        if not theme:
+            return None
+        return canonicalize_theme(theme) or None
+
+    @staticmethod
+    def validate_role(role: Any) -> Optional[str]:
+        """Проверка сгенерированного персонажа: непустое имя на кириллице"""
+        if not isinstance(role, str):
+            return None
+        role = _SPACES_RE.sub(" ", role).strip(" .,;")
+        if not role or len(role) > MAX_ROLE_LENGTH:
+            return None
+        if not _CYRILLIC_RE.search(role) or _LATIN_RE.search(role):
+            return None
+        return role
+
+    def take(self, theme: Optional[str], count: int) -> List[str]:
+        """Забирает до count персонажей из пула и запускает дозаполнение"""
+        key = self.theme_key(theme)
+        buffer = self._buffers.get(key)
+        roles = []
+
+        if buffer is not None:
+            self._buffers.move_to_end(key)
+            while buffer.roles and len(roles) < count:
+                role = buffer.roles.popleft()
+                buffer.known.discard(role.casefold())
+                roles.append(role)
+
+        self.schedule_refill(theme)
+        return roles
+
+    def add(self, theme: Optional[str], roles: List[Any]) -> int:
+        """Добавление персонажей в пул, возвращает число новых"""
+        key = self.theme_key(theme)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = _RoleBuffer()
+            self._evict_themes()
+        self._buffers.move_to_end(key)
+
+        added = 0
+        for role in roles:
+            role = self.validate_role(role)
+            if role is None or role.casefold() in buffer.known:
+                continue
+            buffer.roles.append(role)
+            buffer.known.add(role.casefold())
+            added += 1
+        if added:
+            self._changed.set()
+        return added
+
+    def size(self, theme: Optional[str]) -> int:
+        """Количество готовых персонажей темы"""
+        buffer = self._buffers.get(self.theme_key(theme))
+        return len(buffer.roles) if buffer else 0
+
+    def schedule_refill(self, theme: Optional[str]) -> None:
+        """Фоновое дозаполнение буфера темы до watermark"""
+        key = self.theme_key(theme)
+        if self.size(theme) >= self.watermark or key in self._refills:
+            return
+
+        task = asyncio.create_task(self._refill(theme))
+        self._refills[key] = task
+        task.add_done_callback(lambda done: self._refill_done(key, done))
+
+    def _refill_done(self, key: Optional[str], task: asyncio.Task) -> None:
+        if self._refills.get(key) is task:
+            del self._refills[key]
+        self._changed.set()
+
+    async def wait_for_roles(
+        self,
+        theme: Optional[str],
+        count: int,
+        timeout: float = ROLE_POOL_WAIT_TIMEOUT,
+    ) -> bool:
+        """
+        Ожидание, пока в буфере темы наберется count персонажей, не дольше
+        timeout секунд. False, если дозаполнение закончилось или не успело.
+        """
+        key = self.theme_key(theme)
+
+        async def ready() -> None:
+            while self.size(theme) < count and key in self._refills:
+                self._changed.clear()
+                await self._changed.wait()
+
+        try:
+            await asyncio.wait_for(ready(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.size(theme) >= count
+
+    async def _refill(self, theme: Optional[str]) -> None:
+        try:
+            while self.size(theme) < self.watermark:
+                generated = await self._generator(self.batch_size, theme)
+                added = self.add(theme, generated)
+                logger.info(
+                    f"Пул ролей '{theme or '-'}': +{added}, всего {self.size(theme)}"
+                )
+                if not added:
+                    # Модель повторяется - не крутимся впустую
+                    break
+        except Exception as e:
+            logger.error(f"Ошибка пополнения пула ролей '{theme or '-'}': {e}")
+
+    def _evict_themes(self) -> None:
+        # Буфер без темы не вытесняется и в лимит тем не входит
+        while len(self._buffers) - (None in self._buffers) > self.max_themes:
+            for key in self._buffers:
+                if key is not None:
+                    del self._buffers[key]
+                    # Иначе дозаполнение создаст вытесненный буфер заново
+                    task = self._refills.pop(key, None)
+                    if task is not None:
+                        task.cancel()
+                    break
+
+    async def start(self) -> None:
+        """Начальное заполнение пула без темы"""
+        self.schedule_refill(None)
+
+    async def stop(self) -> None:
+        """Остановка фоновых пополнений"""
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Размеры буферов по темам"""
+        return {key or "": len(buffer.roles) for key, buffer in self._buffers.items()}
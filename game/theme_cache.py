@@ -0,0 +1,272 @@
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import THEME_CACHE_MAX_ROLES, THEME_CACHE_SIZE, THEME_CACHE_TTL
+from database_manager import DatabaseManager
+from game.write_journal import WriteJournal
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-zа-я0-9]+")
+_REPEATS_RE = re.compile(r"(.)\1+")
+
+# Латиница -> кириллица, чтобы "Marvel" и "марвел" считались одной темой.
+# Сначала заменяются сочетания букв, затем отдельные буквы
+_TRANSLIT_PAIRS = {
+    "shch": "щ",
+    "sh": "ш",
+    "ch": "ч",
+    "zh": "ж",
+    "kh": "х",
+    "ck": "к",
+    "ph": "ф",
+    "yu": "ю",
+    "ya": "я",
+    "yo": "йо",
+    "ye": "е",
+}
+_TRANSLIT_CHARS = str.maketrans(
+    {
+        "a": "а",
+        "b": "б",
+        "c": "к",
+        "d": "д",
+        "e": "е",
+        "f": "ф",
+        "g": "г",
+        "h": "х",
+        "i": "и",
+        "j": "дж",
+        "k": "к",
+        "l": "л",
+        "m": "м",
+        "n": "н",
+        "o": "о",
+        "p": "п",
+        "q": "к",
+        "r": "р",
+        "s": "с",
+        "t": "т",
+        "u": "у",
+        "v": "в",
+        "w": "в",
+        "x": "кс",
+        "y": "и",
+        "z": "з",
+    }
+)
+# Звуки, которые по-разному передаются при транслитерации
+# ("Harry" - "Гарри", "Yoda" - "Йода", "Hogwarts" - "Хогвартс"),
+# в ключе темы совпадают
+_PHONETIC_CHARS = str.maketrans({"г": "х", "й": "и", "ц": "тс", "ь": "", "ъ": ""})
+
+# Слова, которые не меняют смысла темы
+_FILLER_WORDS = {
+    "и",
+    "из",
+    "по",
+    "про",
+    "о",
+    "the",
+    "of",
+    "hero",
+    "heroes",
+    "character",
+    "characters",
+    "universe",
+    "world",
+    "герой",
+    "герои",
+    "супергерой",
+    "супергерои",
+    "персонаж",
+    "персонажи",
+    "вселенная",
+    "вселенной",
+    "мир",
+    "мира",
+    "известные",
+    "знаменитые",
+}
+
+
+def _transliterate(word: str) -> str:
+    for latin, cyrillic in _TRANSLIT_PAIRS.items():
+        word = word.replace(latin, cyrillic)
+    return word.translate(_TRANSLIT_CHARS)
+
+
+def canonicalize_theme(theme: str) -> str:
+    """
+    Каноническая форма темы: регистр, ё, транслитерация латиницы,
+    без служебных слов и удвоенных букв, слова по алфавиту.
+    """
+    words = _WORD_RE.findall(theme.casefold().replace("ё", "е"))
+    meaningful = [word for word in words if word not in _FILLER_WORDS] or words
+
+    keys = set()
+    for word in meaningful:
+        word = _transliterate(word).translate(_PHONETIC_CHARS)
+        keys.add(_REPEATS_RE.sub(r"\1", word))
+    return " ".join(sorted(keys))
+
+
+class ThemeCache:
+    """
+    Кэш сгенерированных персонажей по темам (LRU + TTL, хранится в SQLite).
+    Статистика попаданий считается в памяти и пишется в БД через журнал.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        journal: WriteJournal,
+        max_size: int = THEME_CACHE_SIZE,
+        ttl: float = THEME_CACHE_TTL,
+        max_roles: int = THEME_CACHE_MAX_ROLES,
+    ):
+        self.db = db_manager
+        self.journal = journal
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_roles = max_roles
+        self._cache = TTLCache(max_size, ttl)
+        # тема -> {"hits": ..., "misses": ...}
+        self._theme_stats: Dict[str, Dict[str, int]] = {}
+
+    async def get(self, theme: str) -> List[str]:
+        """Персонажи темы из кэша (пустой список при промахе)"""
+        key = canonicalize_theme(theme)
+        if not key:
+            return []
+
+        roles = self._cache.get(key)
+        if roles is None:
+            roles = self._remember(key, await self.db.run_async(self._load, key))
+
+        self._record(key, bool(roles))
+        return list(roles or [])
+
+    async def add(self, theme: str, roles: List[str]) -> None:
+        """Добавление персонажей к теме и сохранение в БД"""
+        key = canonicalize_theme(theme)
+        if not key or not roles:
+            return
+
+        current = self._cache.get(key)
+        if current is None:
+            current = self._remember(key, await self.db.run_async(self._load, key))
+        current = current or []
+        known = {role.casefold() for role in current}
+        merged = list(current)
+        for role in roles:
+            if role.casefold() not in known:
+                known.add(role.casefold())
+                merged.append(role)
+        merged = merged[-self.max_roles :]
+
+        self._cache.set(key, merged)
+        stats = dict(self._theme_stats.get(key, {"hits": 0, "misses": 0}))
+        await self.db.run_async(self._save, key, merged, stats)
+
+    def _remember(
+        self, key: str, row: Optional[Tuple[List[str], Dict[str, int]]]
+    ) -> Optional[List[str]]:
+        """Запоминает прочитанную из БД тему и ее статистику"""
+        if row is None:
+            return None
+        roles, stats = row
+        self._theme_stats.setdefault(key, stats)
+        if roles:
+            self._cache.set(key, roles)
+        return roles
+
+    # ===== Работа с БД =====
+
+    def _load(self, key: str) -> Optional[Tuple[List[str], Dict[str, int]]]:
+        try:
+            with self.db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT characters, hits, misses FROM theme_cache
+                    WHERE theme_key = ? AND created_at > ?
+                    """,
+                    (key, time.time() - self.ttl),
+                )
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            return json.loads(row[0]), {"hits": row[1], "misses": row[2]}
+        except Exception as e:
+            logger.error(f"Ошибка чтения кэша темы '{key}': {e}")
+            return None
+
+    def _save(self, key: str, roles: List[str], stats: Dict[str, int]) -> None:
+        now = time.time()
+        try:
+            with self.db.transaction() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO theme_cache
+                    (theme_key, characters, created_at, last_used, hits, misses)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(theme_key) DO UPDATE SET
+                        characters = excluded.characters,
+                        created_at = excluded.created_at,
+                        last_used = excluded.last_used
+                    """,
+                    (
+                        key,
+                        json.dumps(roles, ensure_ascii=False),
+                        now,
+                        now,
+                        stats["hits"],
+                        stats["misses"],
+                    ),
+                )
+
+                # Вытесняем устаревшие и давно не использованные темы
+                cursor.execute(
+                    "DELETE FROM theme_cache WHERE created_at <= ?", (now - self.ttl,)
+                )
+                cursor.execute(
+                    """
+                    DELETE FROM theme_cache
+                    WHERE theme_key NOT IN (
+                        SELECT theme_key FROM theme_cache
+                        ORDER BY last_used DESC
+                        LIMIT ?
+                    )
+                    """,
+                    (self.max_size,),
+                )
+        except Exception as e:
+            logger.error(f"Ошибка сохранения кэша темы '{key}': {e}")
+
+    def _record(self, key: str, hit: bool) -> None:
+        stats = self._theme_stats.setdefault(key, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+        # Пишем итоговые значения, а не приращения: повторная запись безопасна
+        self.journal.append(
+            """
+            UPDATE theme_cache SET hits = ?, misses = ?, last_used = ?
+            WHERE theme_key = ?
+            """,
+            (stats["hits"], stats["misses"], time.time(), key),
+        )
+
+    # ===== Статистика =====
+
+    def stats(self) -> Dict[str, Any]:
+        """Процент попаданий по каждой теме"""
+        result = {}
+        for key, stats in self._theme_stats.items():
+            # Тема, только что сохраненная через add, еще ни разу не запрашивалась
+            total = stats["hits"] + stats["misses"]
+            result[key] = {**stats, "hit_rate": stats["hits"] / total if total else 0.0}
+        return result
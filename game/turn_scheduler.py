@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[], Awaitable[None]]
+
+
+class TurnScheduler:
+    """
+    Планировщик ходов ботов: у каждого лобби своя очередь шагов,
+    которую по одному выполняет отдельная задача.
+    """
+
+    def __init__(self):
+        self._queues: Dict[int, 'asyncio.Queue[Step]'] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+
+    def schedule(self, lobby_id: int, step: Step) -> None:
+        """Добавляет шаг в очередь лобби и сразу возвращает управление"""
+        queue = self._queues.get(lobby_id)
+        if queue is None:
+            queue = self._queues[lobby_id] = asyncio.Queue()
+            self._workers[lobby_id] = asyncio.create_task(self._run(lobby_id, queue))
+        queue.put_nowait(step)
+
+    async def _run(self, lobby_id: int, queue: 'asyncio.Queue[Step]') -> None:
+        try:
+            # Очередь сняли с регистрации (отмена, остановка) - задача завершается
+            while not queue.empty() and self._queues.get(lobby_id) is queue:
+                step = queue.get_nowait()
+                try:
+                    await step()
+                except Exception as e:
+                    logger.error(f"Ошибка шага игры в лобби {lobby_id}: {e}")
+        finally:
+            # Очередь пуста - освобождаем задачу, новая появится при следующем шаге
+            if self._queues.get(lobby_id) is queue:
+                del self._queues[lobby_id]
+                del self._workers[lobby_id]
+
+    def cancel(self, lobby_id: int) -> None:
+        """Отмена всех запланированных шагов лобби"""
+        queue = self._queues.get(lobby_id)
+        worker = self._workers.get(lobby_id)
+        if queue is None:
+            return
+
+        if worker is asyncio.current_task():
+            # Отмена изнутри шага: текущий шаг доработает, остальные выбрасываем.
+            # Очередь остается за работающей задачей, чтобы новые шаги
+            # выполнялись после текущего, а не второй задачей параллельно
+            while not queue.empty():
+                queue.get_nowait()
+            return
+
+        del self._queues[lobby_id]
+        del self._workers[lobby_id]
+        worker.cancel()
+
+    def is_active(self, lobby_id: int) -> bool:
+        """Есть ли у лобби выполняющиеся или ожидающие шаги"""
+        return lobby_id in self._workers
+
+    async def stop(self) -> None:
+        """Остановка всех очередей"""
+        workers = list(self._workers.values())
+        self._queues.clear()
+        self._workers.clear()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
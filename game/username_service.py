@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from telegram import Bot, User
+
+from config import (
+    USERNAME_CACHE_SIZE,
+    USERNAME_CACHE_TTL,
+    USERNAME_FETCH_CONCURRENCY,
+    USERNAME_NEGATIVE_TTL,
+)
+from utils.single_flight import SingleFlight
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class UsernameService:
+    """
+    Общий сервис имен игроков для уведомлений и меню лобби.
+    Имена берутся из входящих обновлений, к API Telegram обращаемся
+    только при промахе кэша; неудачные запросы тоже кэшируются.
+    """
+
+    _instance: Optional['UsernameService'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        # Защита от повторной инициализации
+        if hasattr(self, "_initialized"):
+            return
+
+        self._cache = TTLCache(USERNAME_CACHE_SIZE, USERNAME_CACHE_TTL)
+        self._single_flight = SingleFlight()
+        # Ограничение одновременных запросов get_chat
+        self._fetch_semaphore = asyncio.Semaphore(USERNAME_FETCH_CONCURRENCY)
+        self.negative = 0
+
+        self._initialized = True
+
+    @staticmethod
+    def format(user_id: int, username: Optional[str]) -> str:
+        """Отображаемое имя игрока"""
+        if user_id < 0:
+            return f"AI Bot {-user_id}"
+        return f"@{username}" if username else f"Игрок {user_id}"
+
+    def remember(self, user: User) -> None:
+        """Сохранение имени из входящего обновления"""
+        self._cache.set(user.id, self.format(user.id, user.username))
+
+    async def resolve(self, bot: Bot, user_id: int) -> str:
+        """Имя игрока: из кэша или через get_chat"""
+        if user_id < 0:
+            return self.format(user_id, None)
+
+        username = self._cache.get(user_id)
+        if username is not None:
+            return username
+
+        return await self._single_flight.do(user_id, lambda: self._fetch(bot, user_id))
+
+    async def resolve_many(self, bot: Bot, user_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Имена нескольких игроков: повторы убираются, кэшированные
+        отдаются сразу, остальные запрашиваются параллельно.
+        """
+        names: Dict[int, str] = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            if user_id < 0:
+                names[user_id] = self.format(user_id, None)
+                continue
+
+            username = self._cache.get(user_id)
+            if username is None:
+                missing.append(user_id)
+            else:
+                names[user_id] = username
+
+        if missing:
+            fetched = await asyncio.gather(
+                *(self.resolve(bot, user_id) for user_id in missing)
+            )
+            names.update(zip(missing, fetched))
+        return names
+
+    async def _fetch(self, bot: Bot, user_id: int) -> str:
+        try:
+            async with self._fetch_semaphore:
+                chat = await bot.get_chat(user_id)
+        except Exception as e:
+            logger.error(f"Ошибка получения username {user_id}: {e}")
+            # Не повторяем запрос для этого игрока какое-то время
+            self.negative += 1
+            username = self.format(user_id, None)
+            self._cache.set(user_id, username, ttl=USERNAME_NEGATIVE_TTL)
+            return username
+
+        username = self.format(user_id, chat.username)
+        self._cache.set(user_id, username)
+        return username
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Сброс кэша для игрока или целиком"""
+        if user_id:
+            self._cache.pop(user_id)
+        else:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кэша имен"""
+        return {
+            **self._cache.stats(),
+            "negative": self.negative,
+            "fetch": self._single_flight.stats(),
+        }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import sqlite3
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import JOURNAL_FLUSH_INTERVAL, JOURNAL_MAX_PENDING, JOURNAL_MAX_RETRIES
+from database_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+Write = Tuple[str, Tuple[Any, ...]]
+
+_BUSY_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED}
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    """БД занята другой записью - такую ошибку имеет смысл повторить"""
+    if getattr(error, "sqlite_errorcode", None) is not None:
+        return error.sqlite_errorcode & 0xFF in _BUSY_CODES
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+class WriteJournal:
+    """
+    Отложенная запись в БД (write-behind).
+    Изменения копятся в памяти и записываются одной транзакцией
+    раз в flush_interval секунд или при накоплении max_pending записей.
+    Порядок записей сохраняется, подряд идущие одинаковые запросы
+    выполняются одним executemany.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        flush_interval: float = JOURNAL_FLUSH_INTERVAL,
+        max_pending: int = JOURNAL_MAX_PENDING,
+        max_retries: int = JOURNAL_MAX_RETRIES,
+    ):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        # Сколько сбросов подряд не удались из-за занятой БД
+        self._retries = 0
+        self._pending: List[Write] = []
+        # Сбросы идут строго по очереди, чтобы не нарушать порядок записей
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._full = asyncio.Event()
+
+        # Метрики
+        self.flushes = 0
+        self.written = 0
+        self.dropped = 0
+
+    def append(self, sql: str, params: Tuple[Any, ...]) -> None:
+        """Добавление записи в журнал"""
+        self._pending.append((sql, params))
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_pending:
+            self._full.set()
+
+    async def _run(self) -> None:
+        """Периодический сброс журнала"""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+
+            await self.flush()
+            if not self._pending:
+                # Журнал пуст - задача завершается, новая появится при записи
+                return
+
+    async def flush(self) -> None:
+        """Запись всех накопленных изменений в БД"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+
+            batch, self._pending = self._pending, []
+            try:
+                written = await self.db.run_async(self._write, batch)
+            except sqlite3.OperationalError as e:
+                if _is_busy(e) and self._retries < self.max_retries:
+                    # БД занята - вернем записи в начало журнала до следующего сброса
+                    self._retries += 1
+                    logger.warning(
+                        f"БД занята, сброс журнала отложен "
+                        f"({self._retries}/{self.max_retries}): {e}"
+                    )
+                    self._pending[:0] = batch
+                    return
+                self._drop(batch, e)
+                return
+            except Exception as e:
+                self._drop(batch, e)
+                return
+
+            self._retries = 0
+            self.flushes += 1
+            self.written += written
+
+    def _drop(self, batch: List[Write], error: Exception) -> None:
+        logger.error(f"Записи журнала потеряны ({len(batch)} записей): {error}")
+        self.dropped += len(batch)
+        self._retries = 0
+
+    def _write(self, batch: List[Write]) -> int:
+        try:
+            with self.db.transaction() as cursor:
+                for sql, group in groupby(batch, key=lambda write: write[0]):
+                    cursor.executemany(sql, [params for _, params in group])
+            return len(batch)
+        except sqlite3.IntegrityError as e:
+            # Например, лобби уже удалено: пишем по одной и пропускаем такие записи
+            logger.warning(f"Журнал записывается по одной записи: {e}")
+            return self._write_each(batch)
+
+    def _write_each(self, batch: List[Write]) -> int:
+        written = 0
+        with self.db.transaction() as cursor:
+            for sql, params in batch:
+                try:
+                    cursor.execute(sql, params)
+                    written += 1
+                except sqlite3.IntegrityError as e:
+                    logger.error(f"Запись журнала пропущена: {e}")
+                    self.dropped += 1
+        return written
+
+    def pending(self) -> int:
+        """Сколько записей ждут сброса"""
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        """Метрики журнала"""
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    async def stop(self) -> None:
+        """Остановка фонового сброса и запись оставшихся изменений"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
@@ -2,6 +2,7 @@ from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes, ConversationHandler
 import logging
 from ServiceController import ServiceContainer
+from game.username_service import UsernameService
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,12 @@ def get_services():
     return get_services._instance
 
 
+async def remember_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Запоминаем имя отправителя любого обновления"""
+    if update.effective_user:
+        UsernameService().remember(update.effective_user)
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обработчик команды /start"""
     user = update.effective_user
@@ -59,14 +66,14 @@ async def leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
         user_id = update.effective_user.id
 
         # Получаем текущее лобби пользователя
-        lobby_id = lobby_manager.get_user_lobby(user_id)
+        lobby_id = await lobby_manager.get_user_lobby(user_id)
 
         if not lobby_id:
             await update.message.reply_text("❌ Вы не находитесь ни в одном лобби.")
             return
 
         # Получаем информацию о лобби для подтверждения
-        lobby_info = lobby_manager.get_lobby_info(lobby_id)
+        lobby_info = await lobby_manager.get_lobby_info(lobby_id)
 
         # Создаем клавиатуру для подтверждения
         keyboard = [
@@ -1,14 +1,11 @@
 import logging
-import os
 
-from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from telegram import Bot
-from telegram.error import TelegramError
 
 from ServiceController import ServiceContainer
 from config import SELECTING_ACTION, CREATING_LOBBY, JOINING_LOBBY, WAITING_FOR_THEME
+from game.username_service import UsernameService
 from handlers.base_command import cancel_leave
 
 logger = logging.getLogger(__name__)
@@ -19,23 +16,12 @@ services = ServiceContainer()
 # Получаем сервисы из контейнера
 lobby_manager = services.lobby_manager
 game_logic = services.game_logic
+usernames = UsernameService()
 
-load_dotenv()
-TOKEN = os.getenv("BOT_TOKEN")
-bot = Bot(token=os.getenv("BOT_TOKEN"))
 
-
-async def get_username_from_id(user_id: int):
-    if user_id < 0:
-        return f"AI Bot {-user_id}"
-
-    try:
-        # Получаем информацию о чате по ID
-        chat = await bot.get_chat(user_id)
-        # Проверяем, есть ли у пользователя username
-        return f"@{chat.username}"
-    except TelegramError as e:
-        return f"Ошибка при получении данных: {e}"
+async def get_usernames_from_ids(context: ContextTypes.DEFAULT_TYPE, user_ids):
+    """Имена нескольких игроков одним параллельным заходом"""
+    return await usernames.resolve_many(context.bot, user_ids)
 
 
 async def lobby_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -71,11 +57,11 @@ async def create_lobby(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    current_lobby_id = lobby_manager.get_user_lobby(user_id)
+    current_lobby_id = await lobby_manager.get_user_lobby(user_id)
 
     if current_lobby_id:
         # Получаем информацию о текущем лобби
-        current_lobby_info = lobby_manager.get_lobby_info(current_lobby_id)
+        current_lobby_info = await lobby_manager.get_lobby_info(current_lobby_id)
 
         if current_lobby_info:
             if current_lobby_info.status == 'playing':
@@ -129,7 +115,7 @@ async def create_lobby(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Если мы здесь, значит пользователь не в лобби - создаем новое
 
     # Создаем лобби (публичное по умолчанию)
-    result = lobby_manager.create_lobby(
+    result = await lobby_manager.create_lobby(
         host_id=user_id,
         max_players=15,
         is_private=False,  # TODO: Добавить выбор приватности
@@ -155,11 +141,11 @@ async def join_lobby(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Проверяем, не находится ли пользователь уже в лобби
-    current_lobby_id = lobby_manager.get_user_lobby(user_id)
+    current_lobby_id = await lobby_manager.get_user_lobby(user_id)
     if current_lobby_id:
         # Теперь проверяем статус лобби отдельно
         # Сначала получаем полную информацию о лобби
-        lobby_info = lobby_manager.get_lobby_info(current_lobby_id)
+        lobby_info = await lobby_manager.get_lobby_info(current_lobby_id)
 
         if lobby_info:
             if lobby_info.status == 'playing':
@@ -224,7 +210,7 @@ async def process_invite_code(update: Update, context: ContextTypes.DEFAULT_TYPE
     user_id = update.effective_user.id
 
     # Сначала проверяем, активна ли игра в лобби
-    lobby = lobby_manager.get_lobby_by_code(invite_code)
+    lobby = await lobby_manager.get_lobby_by_code(invite_code)
     if lobby and lobby.status == 'playing':
         await update.message.reply_text(
             "❌ В этом лобби уже идет игра!\n"
@@ -236,16 +222,16 @@ async def process_invite_code(update: Update, context: ContextTypes.DEFAULT_TYPE
         return JOINING_LOBBY
 
     # Пытаемся присоединиться к лобби
-    result = lobby_manager.join_lobby(user_id, invite_code)
+    result = await lobby_manager.join_lobby(user_id, invite_code)
 
     if result["success"]:
-        lobby_info = lobby_manager.get_lobby_info(result["lobby_id"])
+        lobby_info = await lobby_manager.get_lobby_info(result["lobby_id"])
         # Формируем список игроков
+        names = await get_usernames_from_ids(
+            context, [player['user_id'] for player in lobby_info.players]
+        )
         players_list = "\n".join(
-            [
-                f"👤 {await get_username_from_id(lobby_info.players[i]['user_id'])}"
-                for i in range(len(lobby_info.players))
-            ]
+            [f"👤 {names[player['user_id']]}" for player in lobby_info.players]
         )
 
         message_text = (
@@ -296,7 +282,7 @@ async def my_lobby_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = update.effective_user.id
     # Находим лобби пользователя
-    lobby_id = lobby_manager.get_user_lobby(user_id)
+    lobby_id = await lobby_manager.get_user_lobby(user_id)
 
     if not lobby_id:
         await query.edit_message_text(
@@ -308,13 +294,16 @@ async def my_lobby_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Получаем полную информацию о лобби
-    lobby_info = lobby_manager.get_lobby_info(lobby_id)
+    lobby_info = await lobby_manager.get_lobby_info(lobby_id)
     # Формируем сообщение
+    names = await get_usernames_from_ids(
+        context, [player['user_id'] for player in lobby_info.players]
+    )
     players_list = "\n".join(
         [
             f"{'👑 ' if player['user_id'] == lobby_info.host_id else '👤 ' if player['user_id'] > 0 else '🤖 '}"
-            f"{await get_username_from_id(player['user_id'])}"
-            for i, player in enumerate(lobby_info.players)
+            f"{names[player['user_id']]}"
+            for player in lobby_info.players
         ]
     )
 
@@ -387,7 +376,7 @@ async def leave_lobby(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    lobby_id = lobby_manager.get_user_lobby(user_id)
+    lobby_id = await lobby_manager.get_user_lobby(user_id)
 
     if not lobby_id:
         await query.edit_message_text(
@@ -424,7 +413,7 @@ async def confirm_leave(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Выходим из лобби
-    result = lobby_manager.leave_lobby(user_id, lobby_id)
+    result = await lobby_manager.leave_lobby(user_id, lobby_id)
     logger.info(f"Leave_lobby_return result: {result}")
     if result["success"]:
         # Завершаем обработку выхода
@@ -474,7 +463,7 @@ async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Проверяем статус лобби
-    lobby_info = lobby_manager.get_lobby_info(lobby_id)
+    lobby_info = await lobby_manager.get_lobby_info(lobby_id)
     if lobby_info and lobby_info.status == 'playing':
         await query.edit_message_text(
             "❌ Игра уже идет в этом лобби!",
@@ -494,7 +483,7 @@ async def start_game(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return WAITING_FOR_THEME
 
     # Подготавливаем игру (меняем статус на game_starting)
-    result = lobby_manager.start_game_prepare(lobby_id, user_id)
+    result = await lobby_manager.start_game_prepare(lobby_id, user_id)
 
     if not result["success"]:
         logger.error(
@@ -558,7 +547,7 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
 
     # Проверяем, что пользователь все еще хост
-    lobby_info = lobby_manager.get_lobby_info(lobby_id)
+    lobby_info = await lobby_manager.get_lobby_info(lobby_id)
     if not lobby_info or lobby_info.host_id != user_id:
         await update.message.reply_text(
             "❌ Только хост может настраивать игру!",
@@ -571,7 +560,7 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
     theme = update.message.text.strip()
 
     # Подтверждаем начало игры с темой
-    result = lobby_manager.confirm_start_game(lobby_id)
+    result = await lobby_manager.confirm_start_game(lobby_id)
 
     if not result["success"]:
         await update.message.reply_text(
@@ -592,7 +581,7 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
         final_theme = theme
 
     # Запускаем игровую сессию через GameLogic
-    game_result = game_logic.start_game_session(lobby_id, final_theme)
+    game_result = await game_logic.start_game_session(lobby_id, final_theme)
 
     if not game_result["success"]:
         await update.message.reply_text(
@@ -615,7 +604,16 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return ConversationHandler.END
 
     # Уведомляем хоста об успешном запуске
-    if final_theme:
+    if final_theme and not game_result.get("theme_applied", True):
+        await update.message.reply_text(
+            f"⚠️ Игра начата, но персонажей по теме «{final_theme}» "
+            "не удалось сгенерировать вовремя.\n\n"
+            "Недостающие персонажи выбраны случайно.",
+            reply_markup=InlineKeyboardMarkup(
+                [[InlineKeyboardButton("↩️ В меню", callback_data="back_to_menu")]]
+            ),
+        )
+    elif final_theme:
         await update.message.reply_text(
             f"✅ Игра начата с темой: {final_theme}!\n\n"
             f"Сгенерировано {len(game_state.get_all_players())} персонажей.",
@@ -632,23 +630,6 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
             ),
         )
 
-    # Рассылаем правила игрокам через GameNotifier
-    for player_id in game_state.get_all_players():
-        if player_id < 0:
-            continue
-        # Получаем роли всех игроков, кроме текущего
-        other_players_roles = {}
-        for other_id in game_state.get_all_players():
-            if other_id != player_id:
-                role = game_state.get_player_role(other_id)
-                if role:
-                    other_players_roles[other_id] = role
-
-        # Отправляем правила через GameNotifier
-        await game_logic.notifier.send_game_rules(
-            context, game_state, player_id, other_players_roles
-        )
-
     # Получаем первого игрока
     first_player = game_state.get_current_player()
     if not first_player:
@@ -660,23 +641,12 @@ async def process_game_theme(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return ConversationHandler.END
 
-    # Отправляем уведомление первому игроку через GameNotifier
-    await game_logic.notifier.send_turn_notification(context, game_state, first_player)
+    # Правила, уведомление о первом ходе и объявление о начале - параллельно
+    await game_logic.notifier.send_game_start(context, game_state, first_player)
 
-    # Уведомляем остальных игроков
-    first_player_username = await game_logic.notifier.get_username(
-        context, first_player
-    )
-
-    for player_id in game_state.get_all_players():
-        if player_id != first_player and player_id > 0:
-            await game_logic.notifier.send_to_player(
-                context,
-                player_id,
-                f"🎮 Игра началась!\n"
-                f"Первый ход у: {first_player_username}\n"
-                "Ожидайте вопросов и будьте готовы голосовать!",
-            )
+    if first_player < 0:
+        # Первым ходит бот - его ход выполнится в фоне
+        game_logic.schedule_bot_turn(context, game_state, first_player)
 
     return ConversationHandler.END
 
@@ -691,15 +661,7 @@ async def cancel_game_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Возвращаем статус лобби обратно на waiting
     try:
-        lobby_manager.db.cursor.execute(
-            """
-            UPDATE lobbies
-            SET status = 'waiting'
-            WHERE lobby_id = ?
-            """,
-            (lobby_id,),
-        )
-        lobby_manager.db._connection.commit()
+        await lobby_manager.set_lobby_status(lobby_id, 'waiting')
 
         # Очищаем временные данные
         if 'starting_game_lobby' in context.user_data:
@@ -731,13 +693,13 @@ async def toggle_bots(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
 
     # Пытаемся переключить состояние ботов
-    result = lobby_manager.toggle_bots(lobby_id, user_id)
+    result = await lobby_manager.toggle_bots(lobby_id, user_id)
 
     if result["success"]:
         if result["has_bots"]:
-            lobby_manager.add_bot_to_lobby(lobby_id)
+            await lobby_manager.add_bot_to_lobby(lobby_id)
         else:
-            lobby_manager.remove_bot_to_lobby(lobby_id)
+            await lobby_manager.remove_bot_to_lobby(lobby_id)
 
         # Обновляем информацию о лобби
         await my_lobby_info(update, context)
@@ -1,9 +1,10 @@
 import logging
 import secrets
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from telegram.ext import ContextTypes
 
+from database_manager import run_in_db_thread
 from dto.lobby_dto import LobbyDTO
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,7 @@ class LobbyManager:
         """Генерация уникального кода приглашения"""
         return secrets.token_urlsafe(8).upper().replace("_", "").replace("-", "")[:8]
 
+    @run_in_db_thread
     def create_lobby(
         self, host_id: int, max_players: int = 10, is_private: bool = False
     ) -> Dict[str, Any]:
@@ -25,28 +27,27 @@ class LobbyManager:
         try:
             invite_code = self.generate_invite_code()
 
-            self.db.cursor.execute(
-                """
-                INSERT INTO lobbies
-                (status, max_players, is_private,
-                    host_id, invite_code)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                ("waiting", max_players, is_private, host_id, invite_code),
-            )
-
-            lobby_id = self.db.cursor.lastrowid
+            with self.db.transaction() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO lobbies
+                    (status, max_players, is_private,
+                        host_id, invite_code)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    ("waiting", max_players, is_private, host_id, invite_code),
+                )
 
-            # Добавляем хоста в лобби
-            self.db.cursor.execute(
-                """
-                INSERT INTO lobby_players (lobby_id, user_id)
-                VALUES (?, ?)
-                """,
-                (lobby_id, host_id),
-            )
+                lobby_id = cursor.lastrowid
 
-            self.db._connection.commit()
+                # Добавляем хоста в лобби
+                cursor.execute(
+                    """
+                    INSERT INTO lobby_players (lobby_id, user_id)
+                    VALUES (?, ?)
+                    """,
+                    (lobby_id, host_id),
+                )
 
             return {
                 "success": True,
@@ -56,27 +57,31 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Ошибка при создании лобби",
             }
 
+    @run_in_db_thread
     def get_lobby_by_code(self, invite_code: str) -> Optional[LobbyDTO]:
         """Получение информации о лобби по коду приглашения"""
+        return self._get_lobby_by_code(invite_code)
+
+    def _get_lobby_by_code(self, invite_code: str) -> Optional[LobbyDTO]:
         # TODO: сделать возвращаение только idшника, информацию о лобби надо узнавать только по id этого лобби
-        self.db.cursor.execute(
-            """
-            SELECT lobby_id, status, created_at, max_players,
-                    current_players, is_private, host_id, invite_code, has_bots
-            FROM lobbies
-            WHERE invite_code = ?
-            """,
-            (invite_code,),
-        )
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT lobby_id, status, created_at, max_players,
+                        current_players, is_private, host_id, invite_code, has_bots
+                FROM lobbies
+                WHERE invite_code = ?
+                """,
+                (invite_code,),
+            )
 
-        row = self.db.cursor.fetchone()
+            row = cursor.fetchone()
         if not row:
             return None
 
@@ -101,21 +106,23 @@ class LobbyManager:
 
         return lobby
 
+    @run_in_db_thread
     def get_user_lobby(self, user_id: int) -> Optional[int]:
         """Получить ID лобби, в котором находится пользователь"""
         try:
             # Ищем лобби пользователя
-            self.db.cursor.execute(
-                """
-                SELECT l.lobby_id
-                FROM lobbies l
-                JOIN lobby_players lp ON l.lobby_id = lp.lobby_id
-                WHERE lp.user_id = ?
-                """,
-                (user_id,),
-            )
+            with self.db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT l.lobby_id
+                    FROM lobbies l
+                    JOIN lobby_players lp ON l.lobby_id = lp.lobby_id
+                    WHERE lp.user_id = ?
+                    """,
+                    (user_id,),
+                )
 
-            lobby_data = self.db.cursor.fetchone()
+                lobby_data = cursor.fetchone()
 
             if not lobby_data:
                 return None
@@ -125,58 +132,61 @@ class LobbyManager:
         except:
             return None
 
+    @run_in_db_thread
     def join_lobby(self, user_id: int, invite_code: str) -> Dict[str, Any]:
         """Присоединение к лобби по коду"""
         try:
-            # Получаем информацию о лобби
-            lobby = self.get_lobby_by_code(invite_code)
-            if not lobby:
-                return {
-                    "success": False,
-                    "message": "Лобби не найдено или код недействителен",
-                }
-
-            # Проверка приватности и пароля
-            if lobby.is_private:
-                ...
-                # TODO
-
-            # Проверяем, не присоединен ли уже пользователь
-            self.db.cursor.execute(
-                """
-                SELECT user_id FROM lobby_players
-                WHERE lobby_id = ? AND user_id = ?
-                """,
-                (lobby.lobby_id, user_id),
-            )
-
-            if self.db.cursor.fetchone():
-                return {"success": False, "message": "Вы уже находитесь в этом лобби"}
+            with self.db.transaction() as cursor:
+                # Получаем информацию о лобби
+                lobby = self._get_lobby_by_code(invite_code)
+                if not lobby:
+                    return {
+                        "success": False,
+                        "message": "Лобби не найдено или код недействителен",
+                    }
+
+                # Проверка приватности и пароля
+                if lobby.is_private:
+                    ...
+                    # TODO
+
+                # Проверяем, не присоединен ли уже пользователь
+                cursor.execute(
+                    """
+                    SELECT user_id FROM lobby_players
+                    WHERE lobby_id = ? AND user_id = ?
+                    """,
+                    (lobby.lobby_id, user_id),
+                )
 
-            # Проверяем количество игроков
-            if lobby.current_players >= lobby.max_players:
-                return {"success": False, "message": "Лобби заполнено"}
+                if cursor.fetchone():
+                    return {
+                        "success": False,
+                        "message": "Вы уже находитесь в этом лобби",
+                    }
 
-            # Добавляем игрока в лобби
-            self.db.cursor.execute(
-                """
-                INSERT INTO lobby_players (lobby_id, user_id)
-                VALUES (?, ?)
-                """,
-                (lobby.lobby_id, user_id),
-            )
+                # Проверяем количество игроков
+                if lobby.current_players >= lobby.max_players:
+                    return {"success": False, "message": "Лобби заполнено"}
 
-            # Обновляем счетчик игроков
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET current_players = current_players + 1
-                WHERE lobby_id = ?
-                """,
-                (lobby.lobby_id,),
-            )
+                # Добавляем игрока в лобби
+                cursor.execute(
+                    """
+                    INSERT INTO lobby_players (lobby_id, user_id)
+                    VALUES (?, ?)
+                    """,
+                    (lobby.lobby_id, user_id),
+                )
 
-            self.db._connection.commit()
+                # Обновляем счетчик игроков
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET current_players = current_players + 1
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby.lobby_id,),
+                )
 
             return {
                 "success": True,
@@ -185,63 +195,68 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Ошибка при присоединении к лобби",
             }
 
+    @run_in_db_thread
     def get_lobby_info(self, lobby_id: int) -> Optional[LobbyDTO]:
         """Получение полной информации о лобби"""
-        # Информация о лобби
-        self.db.cursor.execute(
-            """
-            SELECT lobby_id, status, created_at, max_players,
-                    current_players, is_private, host_id,
-                    invite_code, has_bots
-            FROM lobbies
-            WHERE lobby_id = ?
-            """,
-            (lobby_id,),
-        )
+        return self._get_lobby_info(lobby_id)
 
-        row = self.db.cursor.fetchone()
-        if not row:
-            return None
+    def _get_lobby_info(self, lobby_id: int) -> Optional[LobbyDTO]:
+        with self.db.cursor() as cursor:
+            # Информация о лобби
+            cursor.execute(
+                """
+                SELECT lobby_id, status, created_at, max_players,
+                        current_players, is_private, host_id,
+                        invite_code, has_bots
+                FROM lobbies
+                WHERE lobby_id = ?
+                """,
+                (lobby_id,),
+            )
 
-        lobby = LobbyDTO(
-            **dict(
-                zip(
-                    [
-                        "lobby_id",
-                        "status",
-                        "created_at",
-                        "max_players",
-                        "current_players",
-                        "is_private",
-                        "host_id",
-                        "invite_code",
-                        "has_bots",
-                    ],
-                    row,
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            lobby = LobbyDTO(
+                **dict(
+                    zip(
+                        [
+                            "lobby_id",
+                            "status",
+                            "created_at",
+                            "max_players",
+                            "current_players",
+                            "is_private",
+                            "host_id",
+                            "invite_code",
+                            "has_bots",
+                        ],
+                        row,
+                    )
                 )
             )
-        )
 
-        # Список игроков
-        self.db.cursor.execute(
-            """
-            SELECT user_id, joined_at, player_character
-            FROM lobby_players
-            WHERE lobby_id = ?
-            ORDER BY joined_at
-            """,
-            (lobby_id,),
-        )
+            # Список игроков
+            cursor.execute(
+                """
+                SELECT user_id, joined_at, player_character
+                FROM lobby_players
+                WHERE lobby_id = ?
+                ORDER BY joined_at
+                """,
+                (lobby_id,),
+            )
+            player_rows = cursor.fetchall()
 
         players = []
-        for player_row in self.db.cursor.fetchall():
+        for player_row in player_rows:
             players.append(
                 {
                     "user_id": player_row[0],
@@ -253,100 +268,106 @@ class LobbyManager:
         lobby.players = players
         return lobby
 
-    def leave_lobby(self, user_id: int, lobby_id: int) -> Dict[str, Any]:
+    async def leave_lobby(self, user_id: int, lobby_id: int) -> Dict[str, Any]:
         """Выход из лобби с корректной обработкой игровых состояний"""
+        # Шаг 1: Проверяем, идет ли игра (состояние игр живет в event loop,
+        # поэтому здесь, а не в потоке БД). Очередь хода и голос игрока
+        # пересчитываются в process_player_exit по актуальному состоянию
+        exit_info = None
+        if self.game_manager:
+            # Получаем информацию о роли игрока в игре
+            exit_info = self.game_manager.prepare_player_exit(lobby_id, user_id)
+
+        return await self.db.run_async(self._leave_lobby, user_id, lobby_id, exit_info)
+
+    def _leave_lobby(
+        self, user_id: int, lobby_id: int, exit_info: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         try:
-            # Шаг 1: Собираем информацию о состоянии игры ДО удаления
-            exit_info = None
             game_processing_result = None
 
-            if self.game_manager:
-                # Получаем информацию о роли игрока в игре
-                exit_info = self.game_manager.prepare_player_exit(lobby_id, user_id)
-
-            # Шаг 2: Удаляем игрока из базы данных
-            self.db.cursor.execute(
-                """
-                DELETE FROM lobby_players
-                WHERE lobby_id = ? AND user_id = ?
-                """,
-                (lobby_id, user_id),
-            )
-
-            if self.db.cursor.rowcount == 0:
-                return {"success": False, "message": "Игрок не найден в лобби"}
-
-            # Шаг 3: Обновляем счетчик игроков
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET current_players = current_players - 1
-                WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
-
-            # Шаг 4: Получаем информацию об оставшихся игроках
-            self.db.cursor.execute(
-                """
-                SELECT current_players FROM lobbies WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
-
-            remaining_players = self.db.cursor.fetchone()[0]
+            with self.db.transaction() as cursor:
+                # Шаг 2: Удаляем игрока из базы данных
+                cursor.execute(
+                    """
+                    DELETE FROM lobby_players
+                    WHERE lobby_id = ? AND user_id = ?
+                    """,
+                    (lobby_id, user_id),
+                )
 
-            # Шаг 5: Обрабатываем игровое состояние ПОСЛЕ удаления из базы
-            if self.game_manager and exit_info and exit_info.get("has_game"):
-                # Здесь мы будем обрабатывать игровое состояние позже,
-                # через async метод, так как нужен context
-                game_processing_result = {
-                    "needs_processing": True,
-                    "exit_info": exit_info,
-                    "remaining_players": remaining_players,
-                }
+                if cursor.rowcount == 0:
+                    return {"success": False, "message": "Игрок не найден в лобби"}
 
-            # Шаг 6: Обрабатываем состояние лобби
-            if remaining_players == 0:
-                # Если лобби пустое, удаляем его
-                self.db.cursor.execute(
-                    "DELETE FROM lobbies WHERE lobby_id = ?", (lobby_id,)
+                # Шаг 3: Обновляем счетчик игроков
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET current_players = current_players - 1
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
                 )
-            else:
-                # Если вышел хост, назначаем нового хоста
-                self.db.cursor.execute(
+
+                # Шаг 4: Получаем информацию об оставшихся игроках
+                cursor.execute(
                     """
-                    SELECT host_id FROM lobbies WHERE lobby_id = ?
+                    SELECT current_players FROM lobbies WHERE lobby_id = ?
                     """,
                     (lobby_id,),
                 )
-                current_host = self.db.cursor.fetchone()[0]
 
-                if current_host == user_id:
-                    # Находим первого игрока в качестве нового хоста
-                    self.db.cursor.execute(
+                remaining_players = cursor.fetchone()[0]
+
+                # Шаг 5: Обрабатываем игровое состояние ПОСЛЕ удаления из базы
+                if self.game_manager and exit_info and exit_info.get("has_game"):
+                    # Здесь мы будем обрабатывать игровое состояние позже,
+                    # через async метод, так как нужен context
+                    game_processing_result = {
+                        "needs_processing": True,
+                        "exit_info": exit_info,
+                        "remaining_players": remaining_players,
+                    }
+
+                # Шаг 6: Обрабатываем состояние лобби
+                if remaining_players == 0:
+                    # Если лобби пустое, удаляем его
+                    cursor.execute(
+                        "DELETE FROM lobbies WHERE lobby_id = ?", (lobby_id,)
+                    )
+                else:
+                    # Если вышел хост, назначаем нового хоста
+                    cursor.execute(
                         """
-                        SELECT user_id FROM lobby_players
-                        WHERE lobby_id = ?
-                        ORDER BY joined_at
-                        LIMIT 1
+                        SELECT host_id FROM lobbies WHERE lobby_id = ?
                         """,
                         (lobby_id,),
                     )
+                    current_host = cursor.fetchone()[0]
 
-                    new_host = self.db.cursor.fetchone()
-                    if new_host:
-                        # Обновляем хост в таблице лобби
-                        self.db.cursor.execute(
+                    if current_host == user_id:
+                        # Находим первого игрока в качестве нового хоста
+                        cursor.execute(
                             """
-                            UPDATE lobbies
-                            SET host_id = ?
+                            SELECT user_id FROM lobby_players
                             WHERE lobby_id = ?
+                            ORDER BY joined_at
+                            LIMIT 1
                             """,
-                            (new_host[0], lobby_id),
+                            (lobby_id,),
                         )
 
-            self.db._connection.commit()
+                        new_host = cursor.fetchone()
+                        if new_host:
+                            # Обновляем хост в таблице лобби
+                            cursor.execute(
+                                """
+                                UPDATE lobbies
+                                SET host_id = ?
+                                WHERE lobby_id = ?
+                                """,
+                                (new_host[0], lobby_id),
+                            )
 
             return {
                 "success": True,
@@ -358,7 +379,6 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
@@ -372,42 +392,26 @@ class LobbyManager:
         if not exit_result.get("game_processing_result", {}).get("needs_processing"):
             return {"processed": False}
 
-        processing_info = exit_result["game_processing_result"]
         lobby_id = exit_result["lobby_id"]
         user_id = exit_result["user_id"]
 
         # Обрабатываем игровое состояние
         game_result = await self.game_manager.process_player_exit(
-            context, lobby_id, user_id, processing_info["exit_info"]
+            context, lobby_id, user_id
         )
 
         # Если игра завершилась, обновляем статус лобби
         if game_result.get("end_game"):
             try:
-                self.db.cursor.execute(
-                    """
-                    UPDATE lobbies
-                    SET status = 'waiting'
-                    WHERE lobby_id = ?
-                    """,
-                    (lobby_id,),
-                )
-
-                # Очищаем роли у игроков
-                self.db.cursor.execute(
-                    """
-                    UPDATE lobby_players
-                    SET player_character = ''
-                    WHERE lobby_id = ?
-                    """,
-                    (lobby_id,),
-                )
-
-                self.db._connection.commit()
+                # Журнал событий завершенной игры больше не нужен. Отложенные
+                # записи журнала должны попасть в БД раньше сброса ролей
+                self.game_manager.storage.cleanup_game_log(lobby_id)
+                await self.game_manager.storage.flush()
+                await self.db.run_async(self._reset_finished_game, lobby_id)
 
-                # Удаляем состояние игры
-                if lobby_id in self.game_manager.active_games:
-                    del self.game_manager.active_games[lobby_id]
+                # Удаляем состояние игры и ботов лобби
+                self.game_manager.storage.remove_game(lobby_id)
+                self.game_manager.bots.pop(lobby_id, None)
 
             except Exception as e:
                 logger.error(f"Ошибка при обновлении статуса лобби: {e}")
@@ -418,130 +422,199 @@ class LobbyManager:
             "notifications_sent": True,
         }
 
-    def start_game_prepare(self, lobby_id: int, host_id: int) -> Dict[str, Any]:
-        """Подготовка к началу игры - изменение статуса на game_starting"""
-        try:
-            # Проверяем, что пользователь является хостом
-            self.db.cursor.execute(
+    def _reset_finished_game(self, lobby_id: int) -> None:
+        """Возврат лобби в ожидание и очистка ролей после игры"""
+        with self.db.transaction() as cursor:
+            cursor.execute(
                 """
-                SELECT host_id, status FROM lobbies WHERE lobby_id = ?
+                UPDATE lobbies
+                SET status = 'waiting'
+                WHERE lobby_id = ?
                 """,
                 (lobby_id,),
             )
 
-            lobby_data = self.db.cursor.fetchone()
-            if not lobby_data:
-                return {"success": False, "message": "Лобби не найдено"}
-
-            current_host, status = lobby_data
-
-            if current_host != host_id:
-                return {"success": False, "message": "Только хост может начать игру"}
-
-            # Проверяем минимальное количество игроков
-            self.db.cursor.execute(
+            # Очищаем роли у игроков
+            cursor.execute(
                 """
-                SELECT current_players, max_players FROM lobbies WHERE lobby_id = ?
+                UPDATE lobby_players
+                SET player_character = ''
+                WHERE lobby_id = ?
                 """,
                 (lobby_id,),
             )
 
-            players_info = self.db.cursor.fetchone()
-            if players_info[0] < 2:  # Минимум 2 игрока для начала
-                return {
-                    "success": False,
-                    "message": "Для начала игры нужно минимум 2 игрока",
-                }
-
-            # Меняем статус лобби на game_starting
-            self.db.cursor.execute(
+    @run_in_db_thread
+    def set_lobby_status(self, lobby_id: int, status: str) -> None:
+        """Изменение статуса лобби"""
+        with self.db.transaction() as cursor:
+            cursor.execute(
                 """
                 UPDATE lobbies
-                SET status = 'game_starting'
+                SET status = ?
                 WHERE lobby_id = ?
                 """,
-                (lobby_id,),
+                (status, lobby_id),
+            )
+
+    @run_in_db_thread
+    def reset_interrupted_games(self, keep: List[int]) -> List[int]:
+        """
+        Возврат в ожидание лобби, игры которых прервались перезапуском бота
+        (кроме восстановленных keep): статус, роли и история вопросов
+        """
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                """
+                SELECT lobby_id FROM lobbies
+                WHERE status IN ('playing', 'game_starting')
+                """
+            )
+            lobby_ids = [row[0] for row in cursor.fetchall() if row[0] not in keep]
+            params = [(lobby_id,) for lobby_id in lobby_ids]
+
+            cursor.executemany(
+                "UPDATE lobbies SET status = 'waiting' WHERE lobby_id = ?", params
+            )
+            cursor.executemany(
+                """
+                UPDATE lobby_players
+                SET player_character = ''
+                WHERE lobby_id = ?
+                """,
+                params,
+            )
+            cursor.executemany(
+                "DELETE FROM question_history WHERE lobby_id = ?", params
             )
+        return lobby_ids
+
+    @run_in_db_thread
+    def start_game_prepare(self, lobby_id: int, host_id: int) -> Dict[str, Any]:
+        """Подготовка к началу игры - изменение статуса на game_starting"""
+        try:
+            with self.db.transaction() as cursor:
+                # Проверяем, что пользователь является хостом
+                cursor.execute(
+                    """
+                    SELECT host_id, status FROM lobbies WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
-            self.db._connection.commit()
+                lobby_data = cursor.fetchone()
+                if not lobby_data:
+                    return {"success": False, "message": "Лобби не найдено"}
+
+                current_host, status = lobby_data
+
+                if current_host != host_id:
+                    return {
+                        "success": False,
+                        "message": "Только хост может начать игру",
+                    }
+
+                # Проверяем минимальное количество игроков
+                cursor.execute(
+                    """
+                    SELECT current_players, max_players FROM lobbies WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
+
+                players_info = cursor.fetchone()
+                if players_info[0] < 2:  # Минимум 2 игрока для начала
+                    return {
+                        "success": False,
+                        "message": "Для начала игры нужно минимум 2 игрока",
+                    }
+
+                # Меняем статус лобби на game_starting
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET status = 'game_starting'
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
             return {"success": True, "message": "Настройка темы игры"}
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Ошибка при подготовке игры",
             }
 
+    @run_in_db_thread
     def confirm_start_game(self, lobby_id: int) -> Dict[str, Any]:
         """Подтверждение начала игры с темой"""
         try:
-            # Меняем статус лобби на playing
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET status = 'playing'
-                WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
-
-            self.db._connection.commit()
+            with self.db.transaction() as cursor:
+                # Меняем статус лобби на playing
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET status = 'playing'
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
             return {"success": True, "message": "Игра начата"}
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Ошибка при начале игры",
             }
 
+    @run_in_db_thread
     def toggle_bots(self, lobby_id: int, host_id: int) -> Dict[str, Any]:
         """Включение/выключение ботов в лобби"""
         try:
-            # Проверяем, что пользователь является хостом
-            self.db.cursor.execute(
-                """
-                SELECT host_id, status, has_bots FROM lobbies WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
+            with self.db.transaction() as cursor:
+                # Проверяем, что пользователь является хостом
+                cursor.execute(
+                    """
+                    SELECT host_id, status, has_bots FROM lobbies WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
-            lobby_data = self.db.cursor.fetchone()
-            if not lobby_data:
-                return {"success": False, "message": "Лобби не найдено"}
+                lobby_data = cursor.fetchone()
+                if not lobby_data:
+                    return {"success": False, "message": "Лобби не найдено"}
 
-            current_host, status, current_bots_state = lobby_data
+                current_host, status, current_bots_state = lobby_data
 
-            if current_host != host_id:
-                return {
-                    "success": False,
-                    "message": "Только хост может изменять настройки ботов",
-                }
+                if current_host != host_id:
+                    return {
+                        "success": False,
+                        "message": "Только хост может изменять настройки ботов",
+                    }
 
-            # Проверяем, что игра не запущена
-            if status == 'playing':
-                return {
-                    "success": False,
-                    "message": "Нельзя изменять настройки ботов во время игры",
-                }
+                # Проверяем, что игра не запущена
+                if status == 'playing':
+                    return {
+                        "success": False,
+                        "message": "Нельзя изменять настройки ботов во время игры",
+                    }
 
-            # Переключаем состояние
-            new_bots_state = not bool(current_bots_state)
+                # Переключаем состояние
+                new_bots_state = not bool(current_bots_state)
 
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET has_bots = ?
-                WHERE lobby_id = ?
-                """,
-                (new_bots_state, lobby_id),
-            )
-            self.db._connection.commit()
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET has_bots = ?
+                    WHERE lobby_id = ?
+                    """,
+                    (new_bots_state, lobby_id),
+                )
 
             return {
                 "success": True,
@@ -550,46 +623,48 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             return {
                 "success": False,
                 "error": str(e),
                 "message": "Ошибка при изменении настроек ботов",
             }
 
+    @run_in_db_thread
     def add_bot_to_lobby(self, lobby_id: int) -> Dict[str, Any]:
         """Добавление ботов в лобби"""
         try:
-            # Получаем информацию о лобби
-            lobby_info = self.get_lobby_info(lobby_id)
-            if not lobby_info or not lobby_info.has_bots:
-                return {"success": False, "message": "Боты не включены в этом лобби"}
-
-            bot_count = len(
-                list(filter(lambda x: x['user_id'] < 0, lobby_info.players))
-            )
-
-            # Добавляем одного бота
-            bot_id = -(bot_count + 1)
+            with self.db.transaction() as cursor:
+                # Получаем информацию о лобби
+                lobby_info = self._get_lobby_info(lobby_id)
+                if not lobby_info or not lobby_info.has_bots:
+                    return {
+                        "success": False,
+                        "message": "Боты не включены в этом лобби",
+                    }
+
+                bot_count = len(
+                    list(filter(lambda x: x['user_id'] < 0, lobby_info.players))
+                )
 
-            self.db.cursor.execute(
-                """
-                INSERT INTO lobby_players (lobby_id, user_id)
-                VALUES (?, ?)
-                """,
-                (lobby_id, bot_id),
-            )
+                # Добавляем одного бота
+                bot_id = -(bot_count + 1)
 
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET current_players = current_players + 1
-                WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
+                cursor.execute(
+                    """
+                    INSERT INTO lobby_players (lobby_id, user_id)
+                    VALUES (?, ?)
+                    """,
+                    (lobby_id, bot_id),
+                )
 
-            self.db._connection.commit()
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET current_players = current_players + 1
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
             return {
                 "success": True,
@@ -598,46 +673,45 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             logger.error(f"Ошибка добавления бота: {e}")
             return {"success": False, "message": f"Ошибка добавления бота: {str(e)}"}
 
+    @run_in_db_thread
     def remove_bot_to_lobby(self, lobby_id: int) -> Dict[str, Any]:
         """Удаление ботов в лобби"""
         try:
-            # Получаем информацию о лобби
-            lobby_info = self.get_lobby_info(lobby_id)
-            if not lobby_info or lobby_info.has_bots:
-                return {
-                    "success": False,
-                    "message": "Боты включены включены в этом лобби",
-                }
-
-            bots = list(filter(lambda x: x['user_id'] < 0, lobby_info.players))
-            if not bots:
-                return {
-                    "success": False,
-                    "message": "Боты в лобби не найдены",
-                }
-
-            self.db.cursor.execute(
-                """
-                DELETE FROM lobby_players
-                WHERE lobby_id = ? AND user_id = ?
-                """,
-                (lobby_id, bots[-1]['user_id']),
-            )
-
-            self.db.cursor.execute(
-                """
-                UPDATE lobbies
-                SET current_players = current_players - 1
-                WHERE lobby_id = ?
-                """,
-                (lobby_id,),
-            )
+            with self.db.transaction() as cursor:
+                # Получаем информацию о лобби
+                lobby_info = self._get_lobby_info(lobby_id)
+                if not lobby_info or lobby_info.has_bots:
+                    return {
+                        "success": False,
+                        "message": "Боты включены включены в этом лобби",
+                    }
+
+                bots = list(filter(lambda x: x['user_id'] < 0, lobby_info.players))
+                if not bots:
+                    return {
+                        "success": False,
+                        "message": "Боты в лобби не найдены",
+                    }
+
+                cursor.execute(
+                    """
+                    DELETE FROM lobby_players
+                    WHERE lobby_id = ? AND user_id = ?
+                    """,
+                    (lobby_id, bots[-1]['user_id']),
+                )
 
-            self.db._connection.commit()
+                cursor.execute(
+                    """
+                    UPDATE lobbies
+                    SET current_players = current_players - 1
+                    WHERE lobby_id = ?
+                    """,
+                    (lobby_id,),
+                )
 
             return {
                 "success": True,
@@ -646,6 +720,5 @@ class LobbyManager:
             }
 
         except Exception as e:
-            self.db._connection.rollback()
             logger.error(f"Ошибка добавления бота: {e}")
             return {"success": False, "message": f"Ошибка добавления бота: {str(e)}"}
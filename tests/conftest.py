@@ -0,0 +1,11 @@
+import pytest
+
+from database_manager import DatabaseManager
+
+
+@pytest.fixture(scope="session")
+def db(tmp_path_factory):
+    """Общая на все тесты БД во временном каталоге (DatabaseManager - синглтон)"""
+    manager = DatabaseManager(str(tmp_path_factory.mktemp("data") / "test.db"))
+    yield manager
+    manager.disconnect()
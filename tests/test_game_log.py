@@ -0,0 +1,81 @@
+import asyncio
+
+from game import game_manager
+from game.game_manager import GameStorageManager
+from game.game_state import GameState
+from lobby.lobby_manager import LobbyManager
+
+
+def _play(game_state: GameState) -> None:
+    """Несколько ходов: вопрос, голоса, смена хода, выход игрока"""
+    game_state.start_vote("Мой персонаж человек?", 1, 10)
+    game_state.add_vote(2, "yes")
+    game_state.add_vote(-1, "no")
+    game_state.withdraw_vote(2)
+    game_state.add_vote(2, "no")
+    game_state.end_vote()
+    game_state.next_player()
+    game_state.start_vote("Я из мультфильма?", 2, 11)
+    game_state.add_vote(1, "yes")
+    game_state.remove_player(-1, 2)
+    game_state.end_vote()
+    game_state.next_player()
+
+
+def _new_game(events) -> GameState:
+    game_state = GameState(1)
+    game_state.listener = lambda _, kind, data: events.append((kind, dict(data)))
+    for user_id, role in {1: "Шрек", 2: "Осел", -1: "Фиона"}.items():
+        game_state.add_player(user_id, role)
+    game_state.start_game()
+    return game_state
+
+
+def test_replay_matches_live_state():
+    events = []
+    game_state = _new_game(events)
+    _play(game_state)
+
+    restored = GameState.replay(1, events)
+    assert restored.to_dict() == game_state.to_dict()
+    assert restored.get_current_player() == game_state.get_current_player()
+
+
+def test_checkpoint_and_tail_replay_match_live_state():
+    events = []
+    game_state = _new_game(events)
+    game_state.start_vote("Я зеленый?", 1, 9)
+    game_state.add_vote(2, "yes")
+    checkpoint = game_state.to_dict()
+    tail_start = len(events)
+    game_state.add_vote(-1, "yes")
+    game_state.end_vote()
+    _play(game_state)
+
+    restored = GameState.replay(1, events[tail_start:], checkpoint)
+    assert restored.seq == game_state.seq
+    assert restored.to_dict() == game_state.to_dict()
+
+
+def test_stored_log_round_trip_and_cleanup(db, monkeypatch):
+    # Контрольная точка каждые 4 события: в БД и точка, и хвост событий
+    monkeypatch.setattr(game_manager, "GAME_CHECKPOINT_EVERY", 4)
+
+    async def scenario():
+        lobby_id = (await LobbyManager(db, None).create_lobby(1, 5))["lobby_id"]
+        storage = GameStorageManager(db)
+        game_state = storage.create_game(lobby_id, {1: "Шрек", 2: "Осел", -1: "Фиона"})
+        _play(game_state)
+
+        live = game_state.to_dict()
+        restored = await storage.load_game_log(lobby_id)
+        storage.cleanup_game_log(lobby_id)
+        game_state.next_player()  # после очистки в журнал не пишется
+        cleaned = await storage.load_game_log(lobby_id)
+        await storage.journal.stop()
+        return live, restored, cleaned
+
+    live, restored, cleaned = asyncio.run(scenario())
+    assert restored is not None
+    assert restored.to_dict() == live
+    assert cleaned is None
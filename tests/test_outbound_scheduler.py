@@ -0,0 +1,48 @@
+import asyncio
+
+from telegram.error import NetworkError
+
+from game.outbound_scheduler import OutboundScheduler
+
+
+class _Bot:
+    """Заглушка бота: запоминает отправленное, может падать с сетевой ошибкой"""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent = []
+
+    async def send_message(self, chat_id, text, reply_markup=None, parse_mode=None):
+        if self.fail:
+            raise NetworkError("connection reset")
+        self.sent.append((chat_id, text))
+
+
+def _stop_with_unsent(scheduler, bot, chats):
+    async def scenario():
+        sends = [
+            asyncio.create_task(scheduler.send(bot, chat_id, "текст"))
+            for chat_id in chats
+        ]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(scheduler.stop(), 1)
+        return await asyncio.wait_for(asyncio.gather(*sends), 1)
+
+    return asyncio.run(scenario())
+
+
+def test_stop_resolves_messages_delayed_by_chat_limit():
+    scheduler = OutboundScheduler(chat_rate=0.01, chat_burst=1)
+    bot = _Bot()
+    assert _stop_with_unsent(scheduler, bot, [1, 1]) == [True, False]
+
+
+def test_stop_resolves_messages_waiting_for_retry():
+    scheduler = OutboundScheduler(max_retries=5)
+    assert _stop_with_unsent(scheduler, _Bot(fail=True), [1]) == [False]
+
+
+def test_stop_resolves_message_held_by_dispatcher():
+    scheduler = OutboundScheduler(global_rate=0.01)
+    bot = _Bot()
+    assert _stop_with_unsent(scheduler, bot, [1, 2]) == [False, False]
@@ -0,0 +1,29 @@
+import pytest
+
+from game.role_catalog import DEFAULT_ROLES, RoleCatalog
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        '{"roles": ["Шрек"]}'.encode(),
+        '["Шрек", 1]'.encode(),
+        b"[]",
+        "не json".encode(),
+        b"\xff\xfe",
+    ],
+)
+def test_invalid_file_falls_back_to_default(tmp_path, content):
+    path = tmp_path / "roles.json"
+    path.write_bytes(content)
+    assert RoleCatalog(str(path)).roles == DEFAULT_ROLES
+
+
+def test_invalid_update_keeps_previous_catalog(tmp_path):
+    path = tmp_path / "roles.json"
+    path.write_text('["Шрек", "Осел"]', encoding="utf-8")
+    catalog = RoleCatalog(str(path))
+
+    path.write_text('{"roles": []}', encoding="utf-8")
+    catalog._mtime = -1.0
+    assert catalog.roles == ("Шрек", "Осел")
@@ -0,0 +1,51 @@
+import asyncio
+
+from game.role_pool import RolePool
+from game.theme_cache import canonicalize_theme
+
+
+def _generator(delay):
+    async def generate(count, theme):
+        await asyncio.sleep(delay)
+        return [f"Персонаж {'аб'[i % 2] * (i + 1)}" for i in range(count)]
+
+    return generate
+
+
+def test_wait_for_roles_gets_first_batch():
+    async def scenario():
+        pool = RolePool(_generator(0.01), watermark=10, batch_size=5)
+        assert pool.take("Шрек", 4) == []
+        assert await pool.wait_for_roles("Shrek", 4, timeout=1)
+        roles = pool.take("шрек", 4)
+        await pool.stop()
+        return roles
+
+    assert len(asyncio.run(scenario())) == 4
+
+
+def test_wait_for_roles_is_bounded():
+    async def scenario():
+        pool = RolePool(_generator(10), watermark=10, batch_size=5)
+        pool.take("Шрек", 4)
+        ready = await pool.wait_for_roles("Шрек", 4, timeout=0.05)
+        await pool.stop()
+        return ready
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_evicted_theme_stops_refilling():
+    async def scenario():
+        pool = RolePool(_generator(0.01), watermark=10, batch_size=5, max_themes=0)
+        pool.add(None, ["Гарри Поттер"])
+        pool.add("Шрек", ["Осел"])
+        pool.take("Шрек", 1)
+        pool.add("Покемон", ["Пикачу"])
+        await asyncio.sleep(0.1)
+        stats = pool.stats()
+        await pool.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert set(stats) == {"", canonicalize_theme("Покемон")}
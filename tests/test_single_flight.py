@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_are_merged():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)))
+        return results, calls
+
+    assert asyncio.run(scenario()) == ([1, 1, 1], 1)
+
+
+def test_new_call_after_last_waiter_cancelled_starts_fresh():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        waiter = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # Отмененная задача еще не завершилась, но к ней уже нельзя присоединиться
+        return await flight.do("key", fetch), flight.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert result == "ok"
+    assert stats["merged"] == 0
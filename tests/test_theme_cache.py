@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from game.theme_cache import ThemeCache, canonicalize_theme
+from game.write_journal import WriteJournal
+
+
+@pytest.mark.parametrize(
+    "latin, cyrillic",
+    [
+        ("Kino", "кино"),
+        ("Shrek", "Шрек"),
+        ("Pokemon", "Покемон"),
+        ("Harry Potter", "Гарри Поттер"),
+        ("Marvel heroes", "герои Марвел"),
+        ("Naruto", "Наруто"),
+        ("Yoda", "Йода"),
+        ("Hogwarts", "Хогвартс"),
+        ("Cheburashka", "Чебурашка"),
+        ("Tokyo", "Токио"),
+        ("Yuri Gagarin", "Юрий Гагарин"),
+        ("Zhukov", "Жуков"),
+    ],
+)
+def test_latin_and_cyrillic_spellings_share_key(latin, cyrillic):
+    assert canonicalize_theme(latin) == canonicalize_theme(cyrillic)
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ("Звёздные войны", "войны звездные"),
+        ("Персонажи Marvel", "MARVEL"),
+        ("Marvel characters", "Marvel"),
+    ],
+)
+def test_equivalent_wordings_share_key(first, second):
+    assert canonicalize_theme(first) == canonicalize_theme(second)
+
+
+def test_different_themes_differ():
+    assert canonicalize_theme("Шрек") != canonicalize_theme("Покемон")
+
+
+def test_stats_of_theme_only_added(db):
+    async def scenario():
+        journal = WriteJournal(db)
+        await ThemeCache(db, journal).add("Гарри Поттер", ["Гермиона", "Рон"])
+
+        cache = ThemeCache(db, journal)
+        await cache.add("Гарри Поттер", ["Дамблдор"])
+        stats = cache.stats()
+        await journal.stop()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats[canonicalize_theme("Гарри Поттер")]["hit_rate"] == 0.0
@@ -0,0 +1,51 @@
+import asyncio
+
+from game.turn_scheduler import TurnScheduler
+
+
+def test_cancel_inside_step_keeps_single_worker():
+    async def scenario():
+        scheduler = TurnScheduler()
+        running = 0
+        overlaps = []
+        done = []
+
+        async def step(name, cancel=False):
+            nonlocal running
+            running += 1
+            overlaps.append(running)
+            if cancel:
+                scheduler.cancel(1)
+                scheduler.schedule(1, lambda: step("after cancel"))
+            await asyncio.sleep(0.01)
+            done.append(name)
+            running -= 1
+
+        scheduler.schedule(1, lambda: step("first", cancel=True))
+        scheduler.schedule(1, lambda: step("dropped"))
+        while scheduler.is_active(1):
+            await asyncio.sleep(0.01)
+        return overlaps, done
+
+    overlaps, done = asyncio.run(scenario())
+    assert max(overlaps) == 1
+    assert done == ["first", "after cancel"]
+
+
+def test_cancel_from_outside_drops_pending_steps():
+    async def scenario():
+        scheduler = TurnScheduler()
+        done = []
+
+        async def step(name):
+            await asyncio.sleep(0.01)
+            done.append(name)
+
+        scheduler.schedule(1, lambda: step("first"))
+        scheduler.schedule(1, lambda: step("second"))
+        await asyncio.sleep(0)
+        scheduler.cancel(1)
+        await asyncio.sleep(0.05)
+        return done, scheduler.is_active(1)
+
+    assert asyncio.run(scenario()) == ([], False)
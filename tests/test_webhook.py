@@ -0,0 +1,146 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+TOKEN = "123:TEST"
+SECRET = "test-secret"
+
+
+class _FakeBotAPI(BaseHTTPRequestHandler):
+    """Заглушка Bot API: отвечает на методы и запоминает их параметры"""
+
+    calls = []
+
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(body or b"{}")
+        else:
+            params = dict(parse_qsl(body.decode()))
+        self.calls.append((method, params))
+
+        result = True
+        if method == "getMe":
+            result = {
+                "id": 123,
+                "is_bot": True,
+                "first_name": "Test",
+                "username": "test_bot",
+            }
+        payload = json.dumps({"ok": True, "result": result}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def bot_api():
+    _FakeBotAPI.calls = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeBotAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", _FakeBotAPI.calls
+    server.shutdown()
+
+
+def _start_bot(tmp_path, api_url, port, secret):
+    (tmp_path / "data").mkdir(exist_ok=True)
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(ROOT),
+        "BOT_TOKEN": TOKEN,
+        "YANDEX_CLOUD_API_KEY": "test",
+        "YANDEX_CLOUD_FOLDER": "test",
+        "TELEGRAM_API_BASE_URL": api_url,
+        "WEBHOOK_URL": "https://bot.example.com",
+        "WEBHOOK_LISTEN": "127.0.0.1",
+        "WEBHOOK_PORT": str(port),
+        "WEBHOOK_PATH": "telegram",
+        "WEBHOOK_SECRET": secret,
+    }
+    return subprocess.Popen(
+        [sys.executable, str(ROOT / "bot.py")],
+        cwd=tmp_path,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+
+def _post_update(port, secret):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/telegram",
+        data=json.dumps({"update_id": 1}).encode(),
+        headers={
+            "Content-Type": "application/json",
+            "X-Telegram-Bot-Api-Secret-Token": secret,
+        },
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_webhook_registers_and_checks_secret(tmp_path, bot_api):
+    api_url, calls = bot_api
+    port = _free_port()
+    process = _start_bot(tmp_path, api_url, port, SECRET)
+    try:
+        deadline = time.monotonic() + 30
+        while not any(method == "setWebhook" for method, _ in calls):
+            assert process.poll() is None, process.stderr.read().decode()
+            assert time.monotonic() < deadline, "setWebhook не вызван"
+            time.sleep(0.1)
+
+        params = next(params for method, params in calls if method == "setWebhook")
+        assert params["url"] == "https://bot.example.com/telegram"
+        assert params["secret_token"] == SECRET
+        allowed = params["allowed_updates"]
+        if isinstance(allowed, str):
+            allowed = json.loads(allowed)
+        assert sorted(allowed) == ["callback_query", "message"]
+
+        assert _post_update(port, "wrong-secret") == 403
+        assert _post_update(port, SECRET) == 200
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def test_webhook_requires_secret(tmp_path, bot_api):
+    api_url, calls = bot_api
+    process = _start_bot(tmp_path, api_url, _free_port(), "")
+    _, stderr = process.communicate(timeout=30)
+
+    assert process.returncode != 0
+    assert "WEBHOOK_SECRET" in stderr.decode()
+    assert not any(method == "setWebhook" for method, _ in calls)
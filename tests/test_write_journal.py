@@ -0,0 +1,42 @@
+import asyncio
+import sqlite3
+
+from game.write_journal import WriteJournal
+
+
+class _FailingDB:
+    """Заглушка БД: каждый сброс журнала падает с заданной ошибкой"""
+
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    async def run_async(self, func, *args):
+        self.calls += 1
+        raise self.error
+
+
+def _flush(error, max_retries, flushes):
+    async def scenario():
+        db = _FailingDB(error)
+        journal = WriteJournal(db, flush_interval=60, max_retries=max_retries)
+        journal.append("UPDATE t SET x = ?", (1,))
+        for _ in range(flushes):
+            await journal.flush()
+        await journal.stop()
+        return db.calls, journal.stats()
+
+    return asyncio.run(scenario())
+
+
+def test_busy_database_is_retried_up_to_limit():
+    calls, stats = _flush(sqlite3.OperationalError("database is locked"), 2, 5)
+    assert calls == 3
+    assert stats["pending"] == 0
+    assert stats["dropped"] == 1
+
+
+def test_other_operational_errors_are_dropped():
+    calls, stats = _flush(sqlite3.OperationalError("no such table: t"), 2, 5)
+    assert calls == 1
+    assert stats["dropped"] == 1
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    """Выполняющийся вызов и число ожидающих его результата"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Объединение одинаковых одновременных вызовов в один (single-flight)"""
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.merged = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет func() или присоединяется к идущему вызову с тем же ключом.
+        Вызов отменяется, только когда его перестали ждать все участники.
+        """
+        self.calls += 1
+        call = self._in_flight.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._in_flight[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.merged += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # Отмененный вызов сразу убираем: новый участник начнет свой,
+                # а не присоединится к задаче, которая вот-вот завершится отменой
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Сколько вызовов пришло и сколько из них объединено"""
+        return {
+            "calls": self.calls,
+            "merged": self.merged,
+            "in_flight": len(self._in_flight),
+        }